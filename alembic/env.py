@@ -6,7 +6,7 @@ from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
-from app.models import Admin, User, ExamCentre, Student 
+from app.models import Admin, User, ExamCentre, Student, RevokedToken, Subject, StudentResult, ResultAggregate, SubjectRanking, CatalogueVersion
 from sqlmodel import SQLModel
 from app.config import settings
 
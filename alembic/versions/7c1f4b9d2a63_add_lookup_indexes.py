@@ -0,0 +1,38 @@
+"""add lookup indexes
+
+Revision ID: 7c1f4b9d2a63
+Revises: 2ba2f3aee9e2
+Create Date: 2026-10-18 09:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1f4b9d2a63'
+down_revision: Union[str, None] = '2ba2f3aee9e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # users.exam_id already carries the users_exam_id_key unique constraint.
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_admins_email'), 'admins', ['email'], unique=True)
+    op.create_index(op.f('ix_students_exam_id'), 'students', ['exam_id'], unique=True)
+    op.create_index(op.f('ix_students_exam_centre_no'), 'students', ['exam_centre_no'], unique=False)
+    op.create_index(op.f('ix_subjects_subject_name'), 'subjects', ['subject_name'], unique=True)
+    # The primary key is (tokenid, token_jti), which cannot serve lookups by jti alone.
+    op.create_index(op.f('ix_revokedtoken_token_jti'), 'revokedtoken', ['token_jti'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_revokedtoken_token_jti'), table_name='revokedtoken')
+    op.drop_index(op.f('ix_subjects_subject_name'), table_name='subjects')
+    op.drop_index(op.f('ix_students_exam_centre_no'), table_name='students')
+    op.drop_index(op.f('ix_students_exam_id'), table_name='students')
+    op.drop_index(op.f('ix_admins_email'), table_name='admins')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
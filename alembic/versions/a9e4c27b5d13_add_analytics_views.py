@@ -0,0 +1,49 @@
+"""add analytics views
+
+Revision ID: a9e4c27b5d13
+Revises: f1b7d3c5a920
+Create Date: 2026-10-18 16:05:31.442870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e4c27b5d13'
+down_revision: Union[str, None] = 'f1b7d3c5a920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE MATERIALIZED VIEW grade_distribution AS
+        SELECT s.exam_centre_no, s.exam_year, sub.subject_code, sub.subject_name, r.value AS grade, count(*) AS candidates
+        FROM students AS s
+        CROSS JOIN LATERAL jsonb_each_text(CASE WHEN jsonb_typeof(s.result) = 'object' THEN s.result ELSE '{}'::jsonb END) AS r
+        JOIN subjects AS sub ON sub.subject_name = r.key
+        WHERE r.value IS NOT NULL
+        GROUP BY s.exam_centre_no, s.exam_year, sub.subject_code, sub.subject_name, r.value
+    """)
+    # REFRESH ... CONCURRENTLY needs a unique index covering every row.
+    op.create_index('ux_grade_distribution', 'grade_distribution', ['exam_centre_no', 'exam_year', 'subject_code', 'grade'], unique=True)
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW centre_approvals AS
+        SELECT c.exam_centre_no, c.exam_centre_name, s.exam_year,
+               count(*) AS candidates,
+               count(*) FILTER (WHERE s.is_approved) AS approved,
+               count(*) FILTER (WHERE jsonb_typeof(s.result) = 'object' AND s.result <> '{}'::jsonb) AS with_results
+        FROM exam_centres AS c
+        JOIN students AS s ON s.exam_centre_no = c.exam_centre_no
+        GROUP BY c.exam_centre_no, c.exam_centre_name, s.exam_year
+    """)
+    op.create_index('ux_centre_approvals', 'centre_approvals', ['exam_centre_no', 'exam_year'], unique=True)
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW centre_approvals")
+    op.execute("DROP MATERIALIZED VIEW grade_distribution")
@@ -0,0 +1,38 @@
+"""add keyset pagination indexes
+
+Revision ID: b83e5a0c41d7
+Revises: 7c1f4b9d2a63
+Create Date: 2026-10-18 11:02:17.284930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83e5a0c41d7'
+down_revision: Union[str, None] = '7c1f4b9d2a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_created_at_uid', 'users', ['created_at', 'uid'], unique=False)
+    op.create_index('ix_students_created_at_uid', 'students', ['created_at', 'uid'], unique=False)
+    op.create_index('ix_exam_centres_created_at_uid', 'exam_centres', ['created_at', 'uid'], unique=False)
+    op.create_index('ix_admins_created_at_uid', 'admins', ['created_at', 'uid'], unique=False)
+    # Supersedes the single-column index: it serves both the plain lookup and
+    # the paginated per-centre listing.
+    op.create_index('ix_students_exam_centre_no_created_at_uid', 'students', ['exam_centre_no', 'created_at', 'uid'], unique=False)
+    op.drop_index('ix_students_exam_centre_no', table_name='students')
+
+
+def downgrade() -> None:
+    op.create_index('ix_students_exam_centre_no', 'students', ['exam_centre_no'], unique=False)
+    op.drop_index('ix_students_exam_centre_no_created_at_uid', table_name='students')
+    op.drop_index('ix_admins_created_at_uid', table_name='admins')
+    op.drop_index('ix_exam_centres_created_at_uid', table_name='exam_centres')
+    op.drop_index('ix_students_created_at_uid', table_name='students')
+    op.drop_index('ix_users_created_at_uid', table_name='users')
@@ -0,0 +1,59 @@
+"""add result aggregates
+
+Revision ID: c62f0e8d7b34
+Revises: a9e4c27b5d13
+Create Date: 2026-10-18 17:21:09.835214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c62f0e8d7b34'
+down_revision: Union[str, None] = 'a9e4c27b5d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('result_aggregates',
+    sa.Column('student_uid', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('exam_year', sa.Integer(), nullable=False),
+    sa.Column('exam_centre_no', sa.String(), nullable=False),
+    sa.Column('subjects_taken', sa.Integer(), nullable=False),
+    sa.Column('subjects_passed', sa.Integer(), nullable=False),
+    sa.Column('total_points', sa.Integer(), nullable=False),
+    sa.Column('average_points', sa.Float(), nullable=True),
+    sa.Column('passed', sa.Boolean(), nullable=False),
+    sa.Column('national_rank', sa.Integer(), nullable=True),
+    sa.Column('centre_rank', sa.Integer(), nullable=True),
+    sa.Column('computed_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['student_uid'], ['students.uid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('student_uid')
+    )
+    op.create_index('ix_result_aggregates_exam_year_national_rank', 'result_aggregates', ['exam_year', 'national_rank'], unique=False)
+
+    op.create_table('subject_rankings',
+    sa.Column('student_uid', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('subject_code', sa.String(), nullable=False),
+    sa.Column('exam_year', sa.Integer(), nullable=False),
+    sa.Column('grade', sa.String(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('national_rank', sa.Integer(), nullable=False),
+    sa.Column('centre_rank', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['student_uid'], ['students.uid'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['subject_code'], ['subjects.subject_code'], ondelete='CASCADE', onupdate='CASCADE'),
+    sa.PrimaryKeyConstraint('student_uid', 'subject_code')
+    )
+    op.create_index('ix_subject_rankings_exam_year_subject_code_national_rank', 'subject_rankings', ['exam_year', 'subject_code', 'national_rank'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_subject_rankings_exam_year_subject_code_national_rank', table_name='subject_rankings')
+    op.drop_table('subject_rankings')
+    op.drop_index('ix_result_aggregates_exam_year_national_rank', table_name='result_aggregates')
+    op.drop_table('result_aggregates')
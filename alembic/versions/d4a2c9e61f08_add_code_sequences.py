@@ -0,0 +1,30 @@
+"""add code sequences
+
+Revision ID: d4a2c9e61f08
+Revises: b83e5a0c41d7
+Create Date: 2026-10-18 13:40:05.917362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a2c9e61f08'
+down_revision: Union[str, None] = 'b83e5a0c41d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('exam_id_seq')))
+    op.execute(sa.schema.CreateSequence(sa.Sequence('exam_centre_no_seq')))
+    op.execute(sa.schema.CreateSequence(sa.Sequence('subject_code_seq')))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('subject_code_seq')))
+    op.execute(sa.schema.DropSequence(sa.Sequence('exam_centre_no_seq')))
+    op.execute(sa.schema.DropSequence(sa.Sequence('exam_id_seq')))
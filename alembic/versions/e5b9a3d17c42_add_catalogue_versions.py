@@ -0,0 +1,31 @@
+"""add catalogue versions
+
+Revision ID: e5b9a3d17c42
+Revises: c62f0e8d7b34
+Create Date: 2026-10-18 19:06:41.527318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9a3d17c42'
+down_revision: Union[str, None] = 'c62f0e8d7b34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('catalogue_versions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("INSERT INTO catalogue_versions (name, version) VALUES ('subjects', 0)")
+
+
+def downgrade() -> None:
+    op.drop_table('catalogue_versions')
@@ -0,0 +1,48 @@
+"""add student results
+
+Revision ID: f1b7d3c5a920
+Revises: d4a2c9e61f08
+Create Date: 2026-10-18 15:12:48.603117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b7d3c5a920'
+down_revision: Union[str, None] = 'd4a2c9e61f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('student_results',
+    sa.Column('student_uid', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('subject_code', sa.String(), nullable=False),
+    sa.Column('grade', sa.String(), nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['student_uid'], ['students.uid'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['subject_code'], ['subjects.subject_code'], ondelete='CASCADE', onupdate='CASCADE'),
+    sa.PrimaryKeyConstraint('student_uid', 'subject_code')
+    )
+    op.create_index('ix_student_results_subject_code_grade_student_uid', 'student_results', ['subject_code', 'grade', 'student_uid'], unique=False)
+
+    # Backfill from the result documents, which are keyed by subject name.
+    # Keys that match no subject are left behind in the JSONB only.
+    op.execute("""
+        INSERT INTO student_results (student_uid, subject_code, grade, updated_at)
+        SELECT s.uid, sub.subject_code, r.value, COALESCE(s.updated_at, s.created_at)
+        FROM students AS s
+        CROSS JOIN LATERAL jsonb_each_text(CASE WHEN jsonb_typeof(s.result) = 'object' THEN s.result ELSE '{}'::jsonb END) AS r
+        JOIN subjects AS sub ON sub.subject_name = r.key
+        WHERE r.value IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_student_results_subject_code_grade_student_uid', table_name='student_results')
+    op.drop_table('student_results')
@@ -0,0 +1,35 @@
+"""key rankings by exam year
+
+Revision ID: f8c1d6a2e947
+Revises: e5b9a3d17c42
+Create Date: 2026-10-18 21:14:52.306718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8c1d6a2e947'
+down_revision: Union[str, None] = 'e5b9a3d17c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('result_aggregates_pkey', 'result_aggregates', type_='primary')
+    op.create_primary_key('result_aggregates_pkey', 'result_aggregates', ['exam_year', 'student_uid'])
+    op.drop_constraint('subject_rankings_pkey', 'subject_rankings', type_='primary')
+    op.create_primary_key('subject_rankings_pkey', 'subject_rankings', ['exam_year', 'student_uid', 'subject_code'])
+
+
+def downgrade() -> None:
+    # Only one year per student fits the old keys; rankings are recomputed by the next run.
+    op.execute("DELETE FROM subject_rankings")
+    op.execute("DELETE FROM result_aggregates")
+    op.drop_constraint('subject_rankings_pkey', 'subject_rankings', type_='primary')
+    op.create_primary_key('subject_rankings_pkey', 'subject_rankings', ['student_uid', 'subject_code'])
+    op.drop_constraint('result_aggregates_pkey', 'result_aggregates', type_='primary')
+    op.create_primary_key('result_aggregates_pkey', 'result_aggregates', ['student_uid'])
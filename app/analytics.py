@@ -0,0 +1,78 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import text
+from typing import Optional
+import asyncio
+import contextlib
+import logging
+import time
+from .config import settings
+from .db.main import async_session_maker
+from .db.views import MATERIALIZED_VIEWS
+
+
+class AnalyticsRefresher:
+    """Refreshes the analytics materialised views shortly after results change.
+
+    Writers only call schedule(). One background task waits `delay` seconds
+    and then refreshes every view CONCURRENTLY, so a burst of uploads costs
+    a single refresh and readers are never blocked by it. Changes that land
+    while a refresh runs schedule another one.
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self._task: Optional[asyncio.Task] = None
+        self._stale = False
+
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refreshed_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+
+    def schedule(self) -> None:
+        self._stale = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._stale:
+            await asyncio.sleep(self.delay)
+            self._stale = False
+            try:
+                await self.refresh()
+            except (OSError, SQLAlchemyError) as e:
+                self.failures += 1
+                logging.warning(f"Analytics refresh failed: {e}")
+
+    async def refresh(self) -> None:
+        started_at = time.perf_counter()
+        async with async_session_maker() as session:
+            for view in MATERIALIZED_VIEWS:
+                await session.exec(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+            await session.commit()
+
+        self.refreshes += 1
+        self.last_refreshed_at = time.time()
+        self.last_duration = time.perf_counter() - started_at
+
+    async def shutdown(self, refresh_pending: bool = False) -> None:
+        """Cancels the pending refresh, or runs it now when `refresh_pending` is set."""
+        pending = self._task is not None and not self._task.done()
+        if pending:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        if pending and refresh_pending:
+            await self.refresh()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._task is not None and not self._task.done(),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_refreshed_at": self.last_refreshed_at,
+            "last_duration_seconds": self.last_duration,
+        }
+
+
+analytics_refresher = AnalyticsRefresher(delay=settings.ANALYTICS_REFRESH_DELAY)
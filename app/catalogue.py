@@ -0,0 +1,127 @@
+from sqlalchemy import text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Dict, List, Optional, Tuple
+from bisect import bisect_right
+import asyncio
+import time
+import uuid
+from .config import settings
+from .db.main import read_session
+from .models import CatalogueVersion, Subject
+from .schemas import SubjectResponseModel
+
+BUMP_VERSION = text(
+    "INSERT INTO catalogue_versions (name, version) VALUES (:name, 1) "
+    "ON CONFLICT (name) DO UPDATE SET version = catalogue_versions.version + 1"
+)
+
+
+class SubjectSnapshot:
+    """An immutable copy of the subjects table, indexed by code, name and uid.
+
+    Subjects are kept in (subject_name, uid) order, the same keyset as the
+    /subject/all pagination, and each one is serialised once when the
+    snapshot is built.
+    """
+
+    def __init__(self, version: int, subjects: List[Subject]) -> None:
+        self.version = version
+        self.subjects = sorted(subjects, key=lambda subject: (subject.subject_name, subject.uid))
+        self.keys = [(subject.subject_name, subject.uid) for subject in self.subjects]
+        self.by_code: Dict[str, Subject] = {subject.subject_code: subject for subject in self.subjects}
+        self.by_name: Dict[str, Subject] = {subject.subject_name: subject for subject in self.subjects}
+        self.by_uid: Dict[uuid.UUID, Subject] = {subject.uid: subject for subject in self.subjects}
+        self._json = [
+            SubjectResponseModel.model_validate(subject, from_attributes=True).model_dump_json().encode()
+            for subject in self.subjects
+        ]
+
+    def page(self, limit: int, after: Optional[tuple] = None) -> Tuple[List[Subject], bytes]:
+        """Returns up to `limit` subjects after the keyset position `after`, and their JSON array."""
+        start = bisect_right(self.keys, after) if after is not None else 0
+        end = start + limit
+        return self.subjects[start:end], b"[" + b",".join(self._json[start:end]) + b"]"
+
+
+class SubjectCatalogue:
+    """Process-local snapshot of the subjects table.
+
+    Subject writes bump the "subjects" row of catalogue_versions inside
+    their own transaction. A worker serves its snapshot for `check_interval`
+    seconds and then reads the counter, reloading the table only when it
+    moved; the writing worker checks on its next read. The version is read
+    before the rows, so a write landing in between only causes one extra
+    reload, never a stale snapshot under a new version.
+
+    Subjects in a snapshot are detached and shared by every request, so
+    callers must not modify them.
+    """
+
+    NAME = "subjects"
+
+    def __init__(self, check_interval: float) -> None:
+        self.check_interval = check_interval
+        self._snapshot: Optional[SubjectSnapshot] = None
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+        self.checks = 0
+        self.loads = 0
+
+    def _is_fresh(self) -> bool:
+        return self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    async def _refresh(self, session: AsyncSession) -> None:
+        self.checks += 1
+        version = (await session.exec(
+            select(CatalogueVersion.version).where(CatalogueVersion.name == self.NAME)
+        )).first() or 0
+
+        if self._snapshot is None or self._snapshot.version != version:
+            rows = (await session.exec(select(*Subject.__table__.columns))).all()
+            self._snapshot = SubjectSnapshot(version, [Subject(**row._mapping) for row in rows])
+            self.loads += 1
+        self._checked_at = time.monotonic()
+
+    async def get(self, session: Optional[AsyncSession] = None, check: bool = False) -> SubjectSnapshot:
+        """Returns the current snapshot, checking the version counter when it is due.
+
+        Args:
+            session (AsyncSession, optional): Used for the check when given;
+                otherwise a read session is opened only if a check is due.
+            check (bool): Check the version now regardless of the interval.
+                Write paths pass their own session and check=True so they
+                validate against committed data.
+
+        Returns:
+            SubjectSnapshot: The snapshot, which must not be modified.
+        """
+        if check or not self._is_fresh():
+            async with self._lock:
+                if check or not self._is_fresh():
+                    if session is not None:
+                        await self._refresh(session)
+                    else:
+                        async with read_session() as own_session:
+                            await self._refresh(own_session)
+        return self._snapshot
+
+    async def bump(self, session: AsyncSession) -> None:
+        """Moves the version counter; call inside the transaction that writes to subjects."""
+        await session.exec(BUMP_VERSION.bindparams(name=self.NAME))
+
+    def invalidate(self) -> None:
+        """Makes the next read check the counter; call after the write commits."""
+        self._checked_at = float("-inf")
+
+    def stats(self) -> dict:
+        return {
+            "version": self._snapshot.version if self._snapshot is not None else None,
+            "subjects": len(self._snapshot.subjects) if self._snapshot is not None else 0,
+            "checks": self.checks,
+            "loads": self.loads,
+        }
+
+
+subject_catalogue = SubjectCatalogue(check_interval=settings.SUBJECT_CATALOGUE_CHECK_INTERVAL)
@@ -0,0 +1,112 @@
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional
+from .cache import TTLCache
+from .config import settings
+from .db.main import async_session_maker, replica_engine
+from .listener import ChannelListener, channel_listener, notify
+from .models import ExamCentre
+from .singleflight import read_flight
+
+NOTIFY_CHANNEL = "exam_centres_changed"
+
+
+class CentreRegistry:
+    """Per-worker cache of exam centres, keyed by exam_centre_no and uid.
+
+    Centre writes send a NOTIFY on NOTIFY_CHANNEL inside their transaction,
+    so Postgres delivers it only if they commit. The worker's channel
+    listener empties the registry on each notification; the writing worker
+    also empties its own right after committing.
+
+    Entries are only cached while the listener is connected. Losing the
+    connection empties the registry and turns caching off until the
+    listener reconnects. Rows read from the replica are never cached, as it
+    may lag behind the notification.
+
+    Cached centres are detached and shared by every request, so callers
+    must not modify them.
+    """
+
+    COLUMNS = ("exam_centre_no", "uid")
+
+    def __init__(self, maxsize: int, ttl: float, listener: ChannelListener) -> None:
+        self.listener = listener
+        self._caches = {column: TTLCache(maxsize=maxsize, ttl=ttl) for column in self.COLUMNS}
+        self._generation = 0
+
+        self.notifications = 0
+        listener.subscribe(NOTIFY_CHANNEL, self._on_notify, self.invalidate)
+
+    def _store(self, centre: ExamCentre) -> None:
+        for column in self.COLUMNS:
+            self._caches[column].set(str(getattr(centre, column)), centre)
+
+    async def _load(self, column: str, key: str, session: AsyncSession) -> Optional[ExamCentre]:
+        generation = self._generation
+        statement = select(*ExamCentre.__table__.columns).where(getattr(ExamCentre, column) == key)
+        row = (await session.exec(statement)).first()
+        if row is None:
+            return None
+
+        centre = ExamCentre(**row._mapping)
+        # An invalidation that arrived while the row was being read may
+        # concern this very row, so it is returned but not cached.
+        from_replica = replica_engine is not None and session.bind is replica_engine
+        if self.listener.listening and generation == self._generation and not from_replica:
+            self._store(centre)
+        return centre
+
+    async def get(self, column: str, key: str, session: Optional[AsyncSession] = None) -> Optional[ExamCentre]:
+        """Returns the centre whose `column` equals `key`, or None.
+
+        Args:
+            column (str): "exam_centre_no" or "uid".
+            key (str): The value to look up.
+            session (AsyncSession, optional): Used on a miss. Without one, the
+                miss is read from the primary once for all concurrent callers.
+
+        Returns:
+            Optional[ExamCentre]: The centre, which must not be modified.
+        """
+        key = str(key)
+        centre = self._caches[column].get(key)
+        if centre is not None:
+            return centre
+
+        if session is not None:
+            return await self._load(column, key, session)
+
+        async def load():
+            async with async_session_maker() as own_session:
+                return await self._load(column, key, own_session)
+
+        return await read_flight.do(("exam_centre", column, key), load)
+
+    async def notify(self, session: AsyncSession, payload: str = "") -> None:
+        """Queues the change notification; call inside the transaction that writes to exam_centres."""
+        await notify(session, NOTIFY_CHANNEL, payload)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        for cache in self._caches.values():
+            cache.clear()
+
+    def _on_notify(self, payload: str) -> None:
+        self.notifications += 1
+        self.invalidate()
+
+    def stats(self) -> dict:
+        return {
+            "listening": self.listener.listening,
+            "notifications": self.notifications,
+            "reconnects": self.listener.reconnects,
+            **{f"by_{column}": cache.stats() for column, cache in self._caches.items()},
+        }
+
+
+centre_registry = CentreRegistry(
+    maxsize=settings.CENTRE_REGISTRY_SIZE,
+    ttl=settings.CENTRE_REGISTRY_TTL,
+    listener=channel_listener,
+)
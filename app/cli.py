@@ -0,0 +1,75 @@
+"""Command-line entry points for jobs too large for a single HTTP request.
+
+    python -m app.cli register-students cohort.csv > exam_ids.csv
+    python -m app.cli rank-results 2025
+"""
+from typing import List, Optional
+import argparse
+import asyncio
+import csv
+import json
+import sys
+from .analytics import analytics_refresher
+from .db.main import async_session_maker, engine
+from .service import StudentService, RankingService
+from .sheets import iter_records
+
+student = StudentService()
+ranking = RankingService()
+
+
+async def register_students(path: str) -> int:
+    with open(path, "rb") as file:
+        async with async_session_maker() as session:
+            report = await student.scan_registration_records(iter_records(file, path), session)
+            if report["error_count"]:
+                json.dump(report, sys.stderr, indent=2)
+                print(file=sys.stderr)
+                return 1
+
+            file.seek(0)
+            writer = csv.writer(sys.stdout)
+            writer.writerow(["line", "exam_id"])
+
+            async for event in student.bulk_register_students(iter_records(file, path), session):
+                for registered in event.get("students", []):
+                    writer.writerow([registered["line"], registered["exam_id"]])
+
+            print(f"Registered {event['registered']} students", file=sys.stderr)
+
+    await analytics_refresher.shutdown(refresh_pending=True)
+    await engine.dispose()
+    return 0
+
+
+async def rank_results(exam_year: int) -> int:
+    async with async_session_maker() as session:
+        summary = await ranking.rank_exam_year(exam_year, session)
+    json.dump(summary, sys.stdout)
+    print()
+
+    await engine.dispose()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    register = commands.add_parser("register-students", help="Register students from a CSV, XLSX or NDJSON file and print their exam IDs as CSV")
+    register.add_argument("path")
+
+    rank = commands.add_parser("rank-results", help="Recompute the aggregates and rankings of an exam year")
+    rank.add_argument("exam_year", type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "register-students":
+        return asyncio.run(register_students(args.path))
+    if args.command == "rank-results":
+        return asyncio.run(rank_results(args.exam_year))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
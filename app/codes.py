@@ -0,0 +1,72 @@
+from sqlalchemy import Sequence, func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List
+import hashlib
+from .config import settings
+from .models import exam_id_seq, exam_centre_no_seq, subject_code_seq
+
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+# Codes issued before these generators were prefixes of uuid4().hex. Starting
+# every new code with a letter that is not a hex digit keeps the two apart.
+LEADING = "ghijklmnopqrstuvwxyz"
+
+
+class CodeGenerator:
+    """Turns values from a database sequence into short, non-guessable codes.
+
+    Each sequence value is passed through a keyed Feistel network over
+    `bits` bits. The network is a permutation, so distinct sequence values
+    always give distinct codes and no collision check is needed. The result
+    is written in base 36, padded to `length` characters, except that the
+    leading digit is drawn from LEADING, so no code is all hex digits.
+    """
+
+    def __init__(self, sequence: Sequence, length: int, bits: int, key: str, rounds: int = 4) -> None:
+        if bits % 2 or 2 ** bits > len(LEADING) * len(ALPHABET) ** (length - 1):
+            raise ValueError("bits must be even and fit in a leading letter and `length` - 1 base-36 digits")
+
+        self.sequence = sequence
+        self.length = length
+        self.bits = bits
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.round_keys = [
+            hashlib.sha256(f"{key}:{sequence.name}:{i}".encode()).digest()[:16]
+            for i in range(rounds)
+        ]
+
+    def _round(self, value: int, round_key: bytes) -> int:
+        digest = hashlib.blake2b(value.to_bytes(8, "big"), key=round_key, digest_size=8).digest()
+        return int.from_bytes(digest, "big") & self.half_mask
+
+    def permute(self, value: int) -> int:
+        if not 0 <= value < 2 ** self.bits:
+            raise ValueError(f"{self.sequence.name} is exhausted")
+
+        left, right = value >> self.half_bits, value & self.half_mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ self._round(right, round_key)
+        return (left << self.half_bits) | right
+
+    def encode(self, value: int) -> str:
+        digits = []
+        for _ in range(self.length - 1):
+            value, digit = divmod(value, len(ALPHABET))
+            digits.append(ALPHABET[digit])
+        digits.append(LEADING[value])
+        return "".join(reversed(digits))
+
+    def code_for(self, value: int) -> str:
+        return self.encode(self.permute(value))
+
+    async def allocate(self, session: AsyncSession, count: int = 1) -> List[str]:
+        """Reserves `count` sequence values in one round trip and returns their codes."""
+        statement = select(self.sequence.next_value()).select_from(func.generate_series(1, count))
+        values = (await session.exec(statement)).all()
+        return [self.code_for(value) for value in values]
+
+
+exam_id_codes = CodeGenerator(exam_id_seq, length=8, bits=40, key=settings.CODE_GENERATOR_KEY)
+exam_centre_codes = CodeGenerator(exam_centre_no_seq, length=6, bits=30, key=settings.CODE_GENERATOR_KEY)
+subject_codes = CodeGenerator(subject_code_seq, length=6, bits=30, key=settings.CODE_GENERATOR_KEY)
@@ -0,0 +1,79 @@
+"""Conditional GET support: ETag / Last-Modified validators and 304 responses.
+
+Validators are derived from the rows' timestamps rather than from the
+response body, so a request that matches can be answered before anything
+is serialised.
+
+Collection responses only carry an ETag. A row deleted from a page, or
+moved out of it, changes the page without raising its newest timestamp,
+so a Last-Modified of max(updated_at) would answer 304 with a stale page.
+The ETag covers the uid of every row, so it does change.
+"""
+from fastapi import Request, Response, status
+from typing import Any, Iterable, Optional
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+
+def row_version(row: Any) -> Optional[datetime]:
+    return getattr(row, "updated_at", None) or getattr(row, "created_at", None)
+
+def make_etag(*parts: Any) -> str:
+    """A strong ETag over `parts`, which must identify everything the representation depends on."""
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+def etag_for_rows(kind: str, rows: Iterable[Any], *extra: Any) -> str:
+    return make_etag(kind, *extra, *((getattr(row, "uid", None), row_version(row)) for row in rows))
+
+def last_modified_of(rows: Iterable[Any]) -> Optional[datetime]:
+    versions = [version for version in map(row_version, rows) if version is not None]
+    return max(versions) if versions else None
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    # Timestamps are stored naive, in server local time.
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def set_validators(response: Response, etag: str, last_modified: Optional[str], cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = last_modified
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Vary"] = "Authorization"
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison.
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+def _not_modified_since(header: str, last_modified: str) -> bool:
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+
+def response_headers(response: Response) -> dict:
+    """The headers set on an injected `response`, for a Response the route returns itself."""
+    return {key: value for key, value in response.headers.items() if key.lower() not in ("content-length", "content-type")}
+
+def not_modified(request: Request, response: Response) -> Optional[Response]:
+    """Returns a 304 carrying `response`'s headers when the request's validators still match, else None.
+
+    Call set_validators on `response` first.
+    """
+    etag = response.headers.get("etag")
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = etag is not None and _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        last_modified = response.headers.get("last-modified")
+        matched = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+
+    if not matched:
+        return None
+
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=response_headers(response))
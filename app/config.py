@@ -1,10 +1,84 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
     DOMAIN_URL: str
 
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP: int = 5
+
+    DATABASE_REPLICA_URL: Optional[str] = None
+    DB_REPLICA_CONNECT_TIMEOUT: float = 2
+    REPLICA_READ_YOUR_WRITES_SECONDS: float = 2
+    REPLICA_RETRY_SECONDS: float = 30
+
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 1000
+
+    DASHBOARD_STATS_CACHE_TTL: int = 15
+
+    ANALYTICS_REFRESH_DELAY: float = 5
+    # Grades counted as a pass in the analytics pass rates.
+    PASS_GRADES: List[str] = ["A", "B", "C", "D", "E"]
+
+    # Grade scale for aggregates and rankings, best grade first.
+    GRADE_POINTS: Dict[str, int] = {"A": 5, "B": 4, "C": 3, "D": 2, "E": 1, "F": 0}
+    RANKING_MIN_PASSES: int = 5
+    # Subject codes a candidate must pass to pass overall.
+    RANKING_REQUIRED_SUBJECTS: List[str] = []
+
+    UPLOAD_CHUNK_SIZE: int = 5000
+    UPLOAD_MAX_REPORTED_ERRORS: int = 1000
+
+    EXPORT_BATCH_SIZE: int = 2000
+
+    # "local" keeps cached result documents in each process, and sends
+    # invalidations to the other workers with NOTIFY; "redis" shares them
+    # through REDIS_URL.
+    RESULT_CACHE_BACKEND: str = "local"
+    RESULT_CACHE_TTL: int = 60
+    RESULT_CACHE_SIZE: int = 50_000
+    REDIS_URL: Optional[str] = None
+
+    SINGLE_FLIGHT_TIMEOUT: float = 10
+
+    # How long a worker serves its subject catalogue before checking the
+    # shared version counter for writes made by other workers.
+    SUBJECT_CATALOGUE_CHECK_INTERVAL: float = 2
+
+    # Exam centres are cached per worker and invalidated by LISTEN/NOTIFY.
+    # The TTL only bounds staleness if a notification is somehow missed.
+    CENTRE_REGISTRY_SIZE: int = 10_000
+    CENTRE_REGISTRY_TTL: float = 3600
+
+    # Each worker holds one connection that LISTENs for the invalidations of
+    # its per-worker caches, and checks it is still alive this often.
+    NOTIFY_LISTENER_KEEPALIVE: float = 30
+    NOTIFY_LISTENER_RECONNECT_DELAY: float = 5
+
+    # Serialise list and centre reads straight from the rows with orjson
+    # instead of validating them into their response models first.
+    FAST_JSON_RESPONSES: bool = False
+
+    # Cache-Control sent with the ETag / Last-Modified validators on reads.
+    STUDENT_CACHE_CONTROL: str = "private, no-cache"
+    CENTRE_CACHE_CONTROL: str = "private, max-age=60"
+    SUBJECT_CACHE_CONTROL: str = "private, max-age=300"
+
+    # Grades are written to both students.result and student_results; this
+    # switches student reads over to the table once it has been backfilled.
+    RESULTS_READ_FROM_TABLE: bool = False
+
+    # Keys the exam/centre/subject code permutation. Changing it after codes
+    # have been issued lets new codes collide with old ones.
+    CODE_GENERATOR_KEY: str
+
     SECRET_KEY: str
     ALGORITHM: str
 
@@ -25,6 +99,18 @@ class Settings(BaseSettings):
     SUPER_ADMIN_LASTNAME: str
     SUPER_ADMIN_PHONE_NUMBER: str
 
+    REVOKED_TOKEN_CACHE_SIZE: int = 100_000
+    REVOKED_TOKEN_CACHE_TTL: int = 3600
+    VALID_TOKEN_CACHE_TTL: int = 30
+
+    VERIFIED_TOKEN_CACHE_SIZE: int = 10_000
+    VERIFIED_TOKEN_CACHE_TTL: int = 3600
+
+    PASSWD_HASH_EXECUTOR: str = "thread"
+    PASSWD_HASH_WORKERS: int = 4
+    PASSWD_HASH_MAX_QUEUE: int = 64
+    PASSWD_HASH_QUEUE_TIMEOUT: float = 5.0
+
     model_config = SettingsConfigDict(
         env_file=".env",
         extra="ignore"
@@ -1,30 +1,209 @@
-from sqlmodel import create_engine, text, SQLModel 
+from sqlmodel import create_engine, text, SQLModel
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.db.views import CREATE_VIEWS
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
 
-engine = AsyncEngine(
-    create_engine(
-        url=settings.DATABASE_URL
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.total_wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+
+
+def build_engine(url: str, **kwargs) -> AsyncEngine:
+    return AsyncEngine(
+        create_engine(
+            url=url,
+            poolclass=TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            **kwargs
+        )
     )
+
+engine = build_engine(settings.DATABASE_URL)
+
+async_session_maker = sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    expire_on_commit=False
 )
 
+replica_engine = None
+replica_session_maker = None
+
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = build_engine(
+        settings.DATABASE_REPLICA_URL,
+        connect_args={"timeout": settings.DB_REPLICA_CONNECT_TIMEOUT}
+    )
+    replica_session_maker = sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+
+class ReplicaRouter:
+    """Decides whether a read may go to the replica.
+
+    Reads stay on the primary for `read_your_writes` seconds after this worker
+    commits a write, and for `retry_after` seconds after the replica fails.
+    """
+
+    def __init__(self, read_your_writes: float, retry_after: float) -> None:
+        self.read_your_writes = read_your_writes
+        self.retry_after = retry_after
+        self.last_write_at = 0.0
+        self.unavailable_until = 0.0
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    def use_replica(self) -> bool:
+        now = time.monotonic()
+        if now < self.unavailable_until:
+            return False
+        return now - self.last_write_at >= self.read_your_writes
+
+    def record_write(self) -> None:
+        self.last_write_at = time.monotonic()
+
+    def mark_unavailable(self) -> None:
+        self.fallbacks += 1
+        self.unavailable_until = time.monotonic() + self.retry_after
+
+    def stats(self) -> dict:
+        return {
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+            "replica_available": time.monotonic() >= self.unavailable_until,
+        }
+
+replica_router = ReplicaRouter(
+    read_your_writes=settings.REPLICA_READ_YOUR_WRITES_SECONDS,
+    retry_after=settings.REPLICA_RETRY_SECONDS
+)
+
+@event.listens_for(Session, "after_flush")
+def _mark_session_wrote(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "before_commit")
+def _mark_statement_writes(session):
+    # text(), CTE and COPY writes never go through a flush. Postgres only
+    # assigns the transaction an ID once it has written something, so ask it.
+    # Pending ORM changes are left to the flush that follows this event.
+    if session.info.get("wrote") or not session.in_transaction() or session.new or session.dirty or session.deleted:
+        return
+    if session.connection().exec_driver_sql("SELECT txid_current_if_assigned()").scalar() is not None:
+        session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _record_committed_write(session):
+    if session.info.pop("wrote", False):
+        replica_router.record_write()
+
 async def init_db():
     async with engine.begin() as conn:
         from app.models import Admin, ExamCentre, Student, User, RevokedToken
 
         await conn.run_sync(SQLModel.metadata.create_all)
+        for statement in CREATE_VIEWS:
+            await conn.execute(text(statement))
+
+async def warm_up_pool(connections: int = settings.DB_POOL_WARMUP):
+    """Opens `connections` pooled connections up front so the first requests do not pay for connecting."""
+
+    async def touch(target: AsyncEngine):
+        async with target.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # The connections are held concurrently so each one is a distinct pool slot.
+    count = min(connections, settings.DB_POOL_SIZE)
+    await asyncio.gather(*(touch(engine) for _ in range(count)))
+
+    if replica_engine is not None:
+        try:
+            await asyncio.gather(*(touch(replica_engine) for _ in range(count)))
+        except (OSError, SQLAlchemyError, asyncio.TimeoutError) as e:
+            logging.warning(f"Replica warm-up failed, reads will use the primary: {e}")
+            replica_router.mark_unavailable()
+
+def _pool_stats(target: AsyncEngine) -> dict:
+    pool = target.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checkouts": pool.checkouts,
+        "avg_wait_seconds": pool.total_wait_time / pool.checkouts if pool.checkouts else 0.0,
+        "max_wait_seconds": pool.max_wait_time,
+    }
+
+def get_pool_stats() -> dict:
+    return {
+        "primary": _pool_stats(engine),
+        "replica": _pool_stats(replica_engine) if replica_engine is not None else None,
+        "routing": replica_router.stats(),
+    }
 
 from typing import AsyncGenerator
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    async with async_session_maker() as session:
+        yield session
 
-    Session = sessionmaker(
-        bind=engine,
-        class_=AsyncSession,
-        expire_on_commit=False
-    )
+async def _open_read_session() -> AsyncSession:
+    if replica_session_maker is not None and replica_router.use_replica():
+        session = replica_session_maker()
+        try:
+            # Check out a connection now so an unreachable replica is
+            # detected before the route runs its first query.
+            await session.connection()
+            replica_router.replica_reads += 1
+            return session
+        except (OSError, SQLAlchemyError, asyncio.TimeoutError) as e:
+            logging.warning(f"Replica unavailable, falling back to the primary: {e}")
+            await session.close()
+            replica_router.mark_unavailable()
+
+    replica_router.primary_reads += 1
+    return async_session_maker()
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes; uses the replica when one is configured and healthy."""
+    async with await _open_read_session() as session:
+        yield session
 
-    async with Session() as session:
-        yield session
\ No newline at end of file
+read_session = asynccontextmanager(get_read_session)
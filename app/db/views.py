@@ -0,0 +1,55 @@
+"""Materialised views behind the admin analytics endpoints.
+
+Both views carry a unique index so they can be refreshed CONCURRENTLY,
+which keeps them readable while the refresh runs. They are refreshed by
+app.analytics.analytics_refresher after results or approvals change.
+"""
+from sqlalchemy import Integer, BigInteger, String, column, table
+
+GRADE_DISTRIBUTION_SQL = """
+    SELECT s.exam_centre_no, s.exam_year, sub.subject_code, sub.subject_name, r.value AS grade, count(*) AS candidates
+    FROM students AS s
+    CROSS JOIN LATERAL jsonb_each_text(CASE WHEN jsonb_typeof(s.result) = 'object' THEN s.result ELSE '{}'::jsonb END) AS r
+    JOIN subjects AS sub ON sub.subject_name = r.key
+    WHERE r.value IS NOT NULL
+    GROUP BY s.exam_centre_no, s.exam_year, sub.subject_code, sub.subject_name, r.value
+"""
+
+CENTRE_APPROVALS_SQL = """
+    SELECT c.exam_centre_no, c.exam_centre_name, s.exam_year,
+           count(*) AS candidates,
+           count(*) FILTER (WHERE s.is_approved) AS approved,
+           count(*) FILTER (WHERE jsonb_typeof(s.result) = 'object' AND s.result <> '{}'::jsonb) AS with_results
+    FROM exam_centres AS c
+    JOIN students AS s ON s.exam_centre_no = c.exam_centre_no
+    GROUP BY c.exam_centre_no, c.exam_centre_name, s.exam_year
+"""
+
+CREATE_VIEWS = [
+    f"CREATE MATERIALIZED VIEW IF NOT EXISTS grade_distribution AS {GRADE_DISTRIBUTION_SQL}",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_grade_distribution ON grade_distribution (exam_centre_no, exam_year, subject_code, grade)",
+    f"CREATE MATERIALIZED VIEW IF NOT EXISTS centre_approvals AS {CENTRE_APPROVALS_SQL}",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_centre_approvals ON centre_approvals (exam_centre_no, exam_year)",
+]
+
+MATERIALIZED_VIEWS = ("grade_distribution", "centre_approvals")
+
+grade_distribution = table(
+    "grade_distribution",
+    column("exam_centre_no", String),
+    column("exam_year", Integer),
+    column("subject_code", String),
+    column("subject_name", String),
+    column("grade", String),
+    column("candidates", BigInteger),
+)
+
+centre_approvals = table(
+    "centre_approvals",
+    column("exam_centre_no", String),
+    column("exam_centre_name", String),
+    column("exam_year", Integer),
+    column("candidates", BigInteger),
+    column("approved", BigInteger),
+    column("with_results", BigInteger),
+)
@@ -6,6 +6,7 @@ from .db.main import get_session
 from sqlmodel.ext.asyncio.session import AsyncSession
 from .utils import decode_token
 from .service import UserService, AdminService, TokenService
+from .models import User, Admin
 from .errors import (AccessDenied, AccessTokenRequired, InvalidToken, RefreshTokenRequired, RevokedToken)
 
 user_service = UserService()
@@ -19,26 +20,24 @@ class TokenBearer(HTTPBearer):
         super().__init__(auto_error=auto_error)
 
     async def __call__(self, request: Request) -> HTTPAuthorizationCredentials | None:
-        creds = await super().__call__(request)
+        # The decoded claims are shared by every dependency of this request,
+        # so the token is parsed and verified at most once per request.
+        token_data = getattr(request.state, 'token_data', None)
 
-        token = creds.credentials
+        if token_data is None:
+            creds = await super().__call__(request)
 
-        token_data = decode_token(token)
+            token_data = decode_token(creds.credentials)
 
-        if not self.token_valid(token):
-            raise InvalidToken()
+            if token_data is None:
+                raise InvalidToken()
 
+            request.state.token_data = token_data
 
         self.verify_token_data(token_data)
         
         return token_data
     
-    def token_valid(self, token:str) -> bool:
-
-        token_data = decode_token(token)
-
-        return True if token_data is not None else False
-    
     def verify_token_data(self, token_data):
         raise NotImplementedError("Please Override this method in child classes")
 
@@ -54,34 +53,63 @@ class RefreshTokenBearer(TokenBearer):
         if token_data and not token_data['refresh']:
             raise RefreshTokenRequired()
 
-async def get_current_user(token_details: dict = Depends(AccessTokenBearer()), session: AsyncSession = Depends(get_session)):
-    user_email = token_details['user']['email']
+access_token_bearer = AccessTokenBearer()
+refresh_token_bearer = RefreshTokenBearer()
+
+ADMIN_ROLES = ('admin', 'super_admin')
+
+async def resolve_principal(user_data: dict, session: AsyncSession):
+    """Loads the user or admin named by a token's user claims.
 
-    user = await user_service.get_user_by_email(email=user_email, session=session)
+    The role claim picks the table. Tokens signed without one are looked up
+    by primary key in users and then in admins.
+    """
+    role = user_data.get('role')
 
-    return user
+    if role in ADMIN_ROLES:
+        return await admin_service.get_admin_by_uid(user_data['user_uid'], session=session)
+    if role is not None:
+        return await user_service.get_user_by_uid(user_data['user_uid'], session=session)
 
-async def get_current_admin(token_details: dict = Depends(AccessTokenBearer()), session: AsyncSession = Depends(get_session)):
-    admin_email = token_details['user']['email']
-    admin = await admin_service.get_admin_by_email(email=admin_email, session=session)
-    return admin
+    principal = await user_service.get_user_by_uid(user_data['user_uid'], session=session)
+    if principal is None:
+        principal = await admin_service.get_admin_by_uid(user_data['user_uid'], session=session)
+    return principal
+
+async def get_current_principal(token_details: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
+    """Resolves the user or admin behind the access token.
+
+    FastAPI caches dependency results per request, so this runs at most once.
+    """
+    return await resolve_principal(token_details['user'], session)
+
+async def get_current_user(principal = Depends(get_current_principal)):
+    return principal if isinstance(principal, User) else None
+
+async def get_current_admin(principal = Depends(get_current_principal)):
+    return principal if isinstance(principal, Admin) else None
 
 class RoleChecker:
     def __init__(self,allowed_roles:List[str] ) -> None:
 
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user = Depends(get_current_user), current_admin = Depends(get_current_admin)):
-        if current_user is not None and current_user.role in self.allowed_roles:
+    async def __call__(self, token_details: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
+        # The role is signed into access tokens, so the check normally needs
+        # no database round trip; tokens without the claim are looked up.
+        role = token_details['user'].get('role')
+        if role is None:
+            principal = await resolve_principal(token_details['user'], session)
+            role = principal.role if principal is not None else None
+
+        if role in self.allowed_roles:
             return True
-        if current_admin is not None and current_admin.role in self.allowed_roles:
-                return True
         raise AccessDenied()
 
-async def check_revoked_token(token_details: dict = Depends(AccessTokenBearer()), session: AsyncSession = Depends(get_session)):
+async def check_revoked_token(token_details: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
 
     token_jti = token_details['jti']
-    is_blacklisted = await token_service.get_token_from_blacklist(session, token_jti)
+    is_blacklisted = await token_service.get_token_from_blacklist(session, token_jti, expires_at=token_details.get('exp'))
     if is_blacklisted:
         raise RevokedToken()
     return True
\ No newline at end of file
@@ -87,6 +87,34 @@ class SubjectAlreadyExists(ResultifyException):
     """Subject already exists"""
     pass
 
+class InvalidCursor(ResultifyException):
+    """Pagination cursor is malformed or does not match the listing"""
+    pass
+
+class UnsupportedSheet(ResultifyException):
+    """Uploaded file is not a supported sheet format"""
+    pass
+
+class InvalidSheetHeader(ResultifyException):
+    """Uploaded sheet header is not exam_id followed by subject codes"""
+    pass
+
+class HashingUnavailable(ResultifyException):
+    """Password hashing pool is saturated"""
+    pass
+
+class LookupTimeout(ResultifyException):
+    """A shared read did not finish within SINGLE_FLIGHT_TIMEOUT"""
+    pass
+
+class ResultsNotRanked(ResultifyException):
+    """Student has no aggregates because their exam year has not been ranked"""
+    pass
+
+class InvalidFields(ResultifyException):
+    """Requested fields are empty or not part of the response model"""
+    pass
+
 
 def create_exception_handler(status_code:int, initial_detail: Any) -> Callable[[Request, Exception], JSONResponse]:
     async def exception_handler(request: Request, exc: ResultifyException):
@@ -288,6 +316,76 @@ def register_all_errors (app: FastAPI):
             }
         )
     )
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Pagination cursor is invalid",
+                "error": "Request Error"
+            }
+        )
+    )
+    app.add_exception_handler(
+        UnsupportedSheet,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Upload a .csv or .xlsx file (or .ndjson for registrations) in a form field named file",
+                "error": "Unsupported File"
+            }
+        )
+    )
+    app.add_exception_handler(
+        InvalidSheetHeader,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "The first row must be exam_id followed by distinct subject codes",
+                "error": "Invalid Header"
+            }
+        )
+    )
+    app.add_exception_handler(
+        HashingUnavailable,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Server is busy, please try again shortly",
+                "error": "Service Unavailable"
+            }
+        )
+    )
+    app.add_exception_handler(
+        LookupTimeout,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "The lookup took too long, please try again shortly",
+                "error": "Service Unavailable"
+            }
+        )
+    )
+    app.add_exception_handler(
+        ResultsNotRanked,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            initial_detail={
+                "message": "Results for this exam year have not been ranked yet",
+                "error": "Not Ranked"
+            }
+        )
+    )
+    app.add_exception_handler(
+        InvalidFields,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Requested fields are not part of this response",
+                "error": "Request Error"
+            }
+        )
+    )
     app.add_exception_handler(
         RevokedToken,
         create_exception_handler(
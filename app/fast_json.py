@@ -0,0 +1,70 @@
+"""Opt-in fast path that serialises ORM rows straight to JSON bytes.
+
+FastAPI validates every returned row into its response_model and then
+encodes the result with the stdlib json module. With FAST_JSON_RESPONSES
+on, the routes that use model_response instead copy exactly the fields the
+response model declares off each row and hand the dicts to orjson. The
+documented schema stays the same, but the rows are not validated, so this
+is only used where they come straight from the database.
+"""
+from fastapi import Response
+from pydantic import BaseModel
+from typing import Any, Optional, Sequence, Tuple, Type, Union, get_args
+from functools import lru_cache
+import orjson
+import uuid
+from .conditional import response_headers
+from .config import settings
+
+# (key, attribute, plan of a nested model or None) for each serialised field.
+FieldPlan = Tuple[Tuple[str, str, Optional["FieldPlan"]], ...]
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        if isinstance(arg, type) and issubclass(arg, BaseModel):
+            return arg
+    return None
+
+@lru_cache(maxsize=None)
+def field_plan(model: Type[BaseModel], fields: Optional[Tuple[str, ...]] = None) -> FieldPlan:
+    plan = []
+    for name, field in model.model_fields.items():
+        if field.exclude or (fields is not None and name not in fields):
+            continue
+        nested = _nested_model(field.annotation)
+        plan.append((field.serialization_alias or field.alias or name, name, field_plan(nested) if nested else None))
+    return tuple(plan)
+
+def _to_dict(row: Any, plan: FieldPlan) -> dict:
+    data = {}
+    for key, attribute, nested in plan:
+        value = getattr(row, attribute, None)
+        data[key] = _to_dict(value, nested) if nested is not None and value is not None else value
+    return data
+
+def _default(value: Any) -> Any:
+    # asyncpg returns its own uuid.UUID subclass, which orjson only handles through this hook.
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError
+
+def dumps(content: Union[Any, list], model: Type[BaseModel], fields: Optional[Sequence[str]] = None) -> bytes:
+    """Serialises a row, or a list of rows, as `model` would, optionally keeping only `fields`."""
+    plan = field_plan(model, tuple(fields) if fields is not None else None)
+    if isinstance(content, (list, tuple)):
+        return orjson.dumps([_to_dict(row, plan) for row in content], default=_default)
+    return orjson.dumps(_to_dict(content, plan), default=_default)
+
+def model_response(response: Response, content: Any, model: Type[BaseModel], fields: Optional[Sequence[str]] = None) -> Any:
+    """Returns `content` for the route's response_model, or the fast-path Response when enabled.
+
+    A sparse fieldset always takes the fast path: its rows only have the
+    requested columns loaded, so they cannot be validated into `model`.
+    `response` is the route's injected Response, whose headers are carried over.
+    """
+    if fields is None and not settings.FAST_JSON_RESPONSES:
+        return content
+    return Response(content=dumps(content, model, fields), media_type="application/json", headers=response_headers(response))
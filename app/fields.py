@@ -0,0 +1,50 @@
+from fastapi import Query
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, raiseload
+from typing import Iterable, List, Optional, Tuple, Type
+from .errors import InvalidFields
+
+# Always loaded, whatever was asked for: the keyset cursor and the
+# ETag / Last-Modified validators are built from them.
+REQUIRED_COLUMNS = ("uid", "created_at", "updated_at")
+
+
+class FieldSelector:
+    """Dependency parsing a `fields=` query parameter against a response model.
+
+    Returns None when the parameter is absent, otherwise the requested field
+    names in the model's own order. Names the model does not declare are
+    rejected with InvalidFields.
+    """
+
+    def __init__(self, model: Type[BaseModel]) -> None:
+        self.allowed = tuple(model.model_fields)
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(default=None, description="Comma-separated response fields to return; all of them when omitted"),
+    ) -> Optional[Tuple[str, ...]]:
+        if fields is None:
+            return None
+
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        if not requested or not requested.issubset(self.allowed):
+            raise InvalidFields()
+        return tuple(name for name in self.allowed if name in requested)
+
+
+def column_options(entity: type, fields: Optional[Iterable[str]]) -> List:
+    """Loader options that select only the columns behind `fields` and skip unrequested relationships.
+
+    Anything left out raises on access instead of lazy-loading, so a
+    serialiser that strays from `fields` fails loudly.
+    """
+    if fields is None:
+        return []
+
+    mapper = inspect(entity)
+    wanted = {*fields, *REQUIRED_COLUMNS}
+    columns = [getattr(entity, column.key) for column in mapper.column_attrs if column.key in wanted]
+    relationships = [getattr(entity, relationship.key) for relationship in mapper.relationships if relationship.key not in wanted]
+    return [load_only(*columns, raiseload=True), *(raiseload(relationship) for relationship in relationships)]
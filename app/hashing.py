@@ -0,0 +1,127 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+import time
+from .config import settings
+from .errors import HashingUnavailable
+from .utils import generate_passwd_hash, verify_passwd_hash
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification off the event loop.
+
+    At most `max_workers` hashes run at once. Callers beyond that wait in a
+    queue of at most `max_queue` entries for up to `queue_timeout` seconds,
+    after which HashingUnavailable is raised instead of stalling the worker.
+    """
+
+    def __init__(self, executor: str, max_workers: int, max_queue: int, queue_timeout: float) -> None:
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._executor: Optional[Executor] = None
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_time = 0.0
+        self.total_hash_time = 0.0
+        self.max_hash_time = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="passwd-hash")
+        return self._executor
+
+    def _abandon(self, acquire: asyncio.Task) -> None:
+        # The acquire may already hold a permit, or obtain one before the
+        # cancellation lands; either way the permit is handed back.
+        acquire.cancel()
+        acquire.add_done_callback(lambda task: task.cancelled() or self._semaphore.release())
+
+    async def _acquire(self) -> bool:
+        """Waits up to `queue_timeout` for a free worker slot; False when none came up.
+
+        asyncio.wait_for can time out after the semaphore was acquired and
+        drop the permit (before Python 3.12), so the acquire runs as its own
+        task and is abandoned explicitly.
+        """
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            done, _ = await asyncio.wait({acquire}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(acquire)
+            raise
+
+        if done:
+            return True
+        self._abandon(acquire)
+        return False
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HashingUnavailable()
+
+        self.queued += 1
+        queued_at = time.perf_counter()
+        try:
+            acquired = await self._acquire()
+        finally:
+            self.queued -= 1
+        if not acquired:
+            self.rejected += 1
+            raise HashingUnavailable()
+
+        started_at = time.perf_counter()
+        self.total_wait_time += started_at - queued_at
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.running -= 1
+            self.completed += 1
+            self.total_hash_time += elapsed
+            self.max_hash_time = max(self.max_hash_time, elapsed)
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(generate_passwd_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_passwd_hash, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "queue_depth": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.total_wait_time / self.completed if self.completed else 0.0,
+            "avg_hash_seconds": self.total_hash_time / self.completed if self.completed else 0.0,
+            "max_hash_seconds": self.max_hash_time,
+        }
+
+
+password_hasher = PasswordHasher(
+    executor=settings.PASSWD_HASH_EXECUTOR,
+    max_workers=settings.PASSWD_HASH_WORKERS,
+    max_queue=settings.PASSWD_HASH_MAX_QUEUE,
+    queue_timeout=settings.PASSWD_HASH_QUEUE_TIMEOUT
+)
@@ -0,0 +1,109 @@
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import contextlib
+import logging
+from .config import settings
+
+
+async def notify(session: AsyncSession, channel: str, *payloads: str) -> None:
+    """Queues a notification per payload on `channel`; Postgres delivers them when the transaction commits."""
+    await session.exec(
+        text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload")
+        .bindparams(channel=channel, payloads=list(payloads or [""]))
+    )
+
+
+class ChannelListener:
+    """A worker's dedicated asyncpg connection that LISTENs on Postgres channels.
+
+    Per-worker caches subscribe a channel with two callbacks: `on_notify`
+    gets each notification's payload, and `on_reset` is called whenever the
+    worker may have missed notifications, i.e. once LISTEN has taken effect
+    and whenever the connection is lost. Subscribers should only cache
+    while `listening` is true, since a worker that cannot hear
+    notifications cannot know when its entries go stale.
+    """
+
+    def __init__(self, keepalive: float, reconnect_delay: float) -> None:
+        self.keepalive = keepalive
+        self.reconnect_delay = reconnect_delay
+        self._subscribers: Dict[str, List[Tuple[Callable[[str], None], Callable[[], None]]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.listening = False
+
+        self.reconnects = 0
+
+    def subscribe(self, channel: str, on_notify: Callable[[str], None], on_reset: Callable[[], None]) -> None:
+        """Registers callbacks for `channel`; call before start()."""
+        self._subscribers.setdefault(channel, []).append((on_notify, on_reset))
+
+    def _reset(self) -> None:
+        for subscribers in self._subscribers.values():
+            for _, on_reset in subscribers:
+                on_reset()
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        for on_notify, _ in self._subscribers.get(channel, ()):
+            on_notify(payload)
+
+    async def _listen(self, dsn: str) -> None:
+        import asyncpg
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                for channel in self._subscribers:
+                    await connection.add_listener(channel, self._on_notify)
+
+                # Anything cached before LISTEN took effect may have missed a notification.
+                self._reset()
+                self.listening = True
+
+                while not lost.is_set():
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(lost.wait(), self.keepalive)
+                    if not lost.is_set():
+                        # A silently dropped connection is only noticed by using it.
+                        await connection.fetchval("SELECT 1", timeout=self.keepalive)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logging.warning(f"Notification listener failed, per-worker caching is off until it reconnects: {e}")
+            finally:
+                self.listening = False
+                self._reset()
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+            self.reconnects += 1
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self, database_url: str = settings.DATABASE_URL) -> None:
+        """Starts listening in the background; subscribers skip their caches until it connects."""
+        if self._subscribers and (self._task is None or self._task.done()):
+            dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+            self._task = asyncio.get_running_loop().create_task(self._listen(dsn))
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "listening": self.listening,
+            "channels": sorted(self._subscribers),
+            "reconnects": self.reconnects,
+        }
+
+
+channel_listener = ChannelListener(
+    keepalive=settings.NOTIFY_LISTENER_KEEPALIVE,
+    reconnect_delay=settings.NOTIFY_LISTENER_RECONNECT_DELAY,
+)
@@ -1,19 +1,27 @@
 from fastapi import FastAPI, APIRouter
 import logging
 from contextlib import asynccontextmanager
-from .db.main import init_db, get_session
+from .db.main import init_db, get_session, warm_up_pool
 from sqlmodel.ext.asyncio.session import AsyncSession
 from .routers import admin, centre, student, user, subject
 from .service import AdminService
 from .errors import register_all_errors
 from .middleware import register_middleware
+from .hashing import password_hasher
+from .analytics import analytics_refresher
+from .listener import channel_listener
 
 
 @asynccontextmanager
 async def life_span(app:FastAPI):
     print(f"Server is starting...")
     await init_db()
+    await warm_up_pool()
+    await channel_listener.start()
     yield
+    await channel_listener.stop()
+    await analytics_refresher.shutdown()
+    password_hasher.shutdown()
     print(f"Server has been stopped")
 
 version = "v1"
@@ -29,6 +29,7 @@ def register_middleware(app: FastAPI):
         allow_methods=["*"],
         allow_headers=["*"],
         allow_credentials = True,
+        expose_headers=["X-Next-Cursor", "ETag"],
     )
 
     app.add_middleware(
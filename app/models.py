@@ -1,16 +1,24 @@
-from sqlmodel import SQLModel, Field, Column, String, Relationship, Text
+from sqlmodel import SQLModel, Field, Column, String, Relationship, Text, Index, ForeignKey
 from datetime import datetime, timezone
 import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import PrimaryKeyConstraint, Sequence
 import uuid
 from typing import Optional, List
 
 
+# CODE SEQUENCES (see app/codes.py)
+exam_id_seq = Sequence("exam_id_seq", metadata=SQLModel.metadata)
+exam_centre_no_seq = Sequence("exam_centre_no_seq", metadata=SQLModel.metadata)
+subject_code_seq = Sequence("subject_code_seq", metadata=SQLModel.metadata)
+
+
 # USERS
 class User(SQLModel, table=True):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_created_at_uid", "created_at", "uid"),)
 
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    email: str = Field(nullable=False)
+    email: str = Field(nullable=False, unique=True, index=True)
     password: str = Field(nullable=False) 
     first_name: str = Field(nullable=False)
     last_name: str = Field(nullable=False)
@@ -21,7 +29,7 @@ class User(SQLModel, table=True):
     is_verified: bool = Field(default=False)
     is_paid: bool = Field(default=False)
     created_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, nullable=False))
-    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now))
     
 
     def __repr__(self):
@@ -30,25 +38,89 @@ class User(SQLModel, table=True):
 # STUDENTS
 class Student(SQLModel, table=True):
     __tablename__ = "students"
+    __table_args__ = (
+        Index("ix_students_created_at_uid", "created_at", "uid"),
+        Index("ix_students_exam_centre_no_created_at_uid", "exam_centre_no", "created_at", "uid"),
+    )
 
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     first_name: str = Field(nullable=False)
     last_name: str = Field(nullable=False)
     exam_centre_no: str = Field(foreign_key="exam_centres.exam_centre_no", nullable=False) 
-    exam_id: str = Field(nullable=False)
+    exam_id: str = Field(nullable=False, unique=True, index=True)
     is_approved: bool = Field(default=False)
     exam_year: int = Field(nullable=False)
     result: Optional[dict] = Field(sa_column=Column("result", pg.JSONB(astext_type=Text())))
     created_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, nullable=False))
-    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now))
-    exam_centre: Optional['ExamCentre'] = Relationship(back_populates="students", sa_relationship_kwargs={"lazy":"selectin"})
+    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now))
+    exam_centre: Optional['ExamCentre'] = Relationship(back_populates="students", sa_relationship_kwargs={"lazy":"joined"})
 
     def __repr__(self):
         return f"<Result {self.uid}>"
 
+# STUDENT RESULTS
+# One row per student and subject, written alongside Student.result while
+# reads move over from the JSONB document.
+class StudentResult(SQLModel, table=True):
+    __tablename__ = "student_results"
+    __table_args__ = (
+        Index("ix_student_results_subject_code_grade_student_uid", "subject_code", "grade", "student_uid"),
+    )
+
+    student_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("students.uid", ondelete="CASCADE"), primary_key=True))
+    subject_code: str = Field(sa_column=Column(String, ForeignKey("subjects.subject_code", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True))
+    grade: str = Field(nullable=False)
+    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now, nullable=False))
+
+    def __repr__(self):
+        return f"<StudentResult {self.student_uid} {self.subject_code}>"
+
+# RESULT AGGREGATES
+# Written in bulk by RankingService for a whole exam year at a time.
+class ResultAggregate(SQLModel, table=True):
+    __tablename__ = "result_aggregates"
+    __table_args__ = (
+        PrimaryKeyConstraint("exam_year", "student_uid"),
+        Index("ix_result_aggregates_exam_year_national_rank", "exam_year", "national_rank"),
+    )
+
+    student_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("students.uid", ondelete="CASCADE"), primary_key=True))
+    exam_year: int = Field(primary_key=True)
+    exam_centre_no: str = Field(nullable=False)
+    subjects_taken: int = Field(nullable=False)
+    subjects_passed: int = Field(nullable=False)
+    total_points: int = Field(nullable=False)
+    average_points: Optional[float] = Field(default=None, nullable=True)
+    passed: bool = Field(nullable=False)
+    national_rank: Optional[int] = Field(default=None, nullable=True)
+    centre_rank: Optional[int] = Field(default=None, nullable=True)
+    computed_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, nullable=False))
+
+    def __repr__(self):
+        return f"<ResultAggregate {self.student_uid}>"
+
+class SubjectRanking(SQLModel, table=True):
+    __tablename__ = "subject_rankings"
+    __table_args__ = (
+        PrimaryKeyConstraint("exam_year", "student_uid", "subject_code"),
+        Index("ix_subject_rankings_exam_year_subject_code_national_rank", "exam_year", "subject_code", "national_rank"),
+    )
+
+    student_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("students.uid", ondelete="CASCADE"), primary_key=True))
+    subject_code: str = Field(sa_column=Column(String, ForeignKey("subjects.subject_code", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True))
+    exam_year: int = Field(primary_key=True)
+    grade: str = Field(nullable=False)
+    points: int = Field(nullable=False)
+    national_rank: int = Field(nullable=False)
+    centre_rank: int = Field(nullable=False)
+
+    def __repr__(self):
+        return f"<SubjectRanking {self.student_uid} {self.subject_code}>"
+
 # EXAM_CENTRES
 class ExamCentre(SQLModel, table=True):
     __tablename__ = "exam_centres"
+    __table_args__ = (Index("ix_exam_centres_created_at_uid", "created_at", "uid"),)
 
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     exam_centre_no: str = Field(nullable=False, unique=True)
@@ -58,8 +130,10 @@ class ExamCentre(SQLModel, table=True):
     exam_centre_admin_email: str = Field(nullable=False, unique=True)
     exam_centre_admin_phone: str = Field(nullable=False)
     created_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, nullable=False))
-    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now))
-    students: List['Student'] = Relationship(back_populates="exam_centre", sa_relationship_kwargs={"lazy":"selectin"})
+    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now))
+    # A centre can hold thousands of students, so they are never loaded
+    # implicitly; use StudentService.get_students_by_exam_centre_no instead.
+    students: List['Student'] = Relationship(back_populates="exam_centre", sa_relationship_kwargs={"lazy":"raise", "passive_deletes":True})
 
     def __repr__(self):
         return f"<exam_centre {self.exam_centre_name}>"
@@ -68,9 +142,10 @@ class ExamCentre(SQLModel, table=True):
 # ADMIN
 class Admin(SQLModel, table=True):
     __tablename__ = "admins"
+    __table_args__ = (Index("ix_admins_created_at_uid", "created_at", "uid"),)
 
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    email: str = Field(nullable=False)
+    email: str = Field(nullable=False, unique=True, index=True)
     password: str = Field(nullable=False) 
     first_name: str = Field(nullable=False)
     last_name: str = Field(nullable=False)
@@ -78,7 +153,7 @@ class Admin(SQLModel, table=True):
     role: str = Field(nullable=False, default="admin")
     is_verified: bool = Field(default=False)
     created_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, nullable=False))
-    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now))
 
     def __repr__(self):
         return f"<Admin {self.first_name}>"
@@ -94,7 +169,7 @@ class RevokedToken(SQLModel, table=True):
             default=uuid.uuid4
         )
     )
-    token_jti : str = Field(sa_column= Column(String(300), primary_key=True))
+    token_jti : str = Field(sa_column= Column(String(300), primary_key=True, index=True))
 
     def __repr__(self):
         return f"<Token {self.token_jti}>"
@@ -105,10 +180,21 @@ class Subject(SQLModel, table=True):
     __tablename__ = "subjects"
 
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    subject_name: str = Field(nullable=False)
+    subject_name: str = Field(nullable=False, unique=True, index=True)
     subject_code: str = Field(nullable=False, unique=True)
     created_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, nullable=False))
-    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(sa_column= Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now))
+
+    def __repr__(self):
+        return f"<Subject {self.subject_name}>"
+
+# CATALOGUE VERSIONS
+class CatalogueVersion(SQLModel, table=True):
+    """A counter bumped in the same transaction as every write to a cached catalogue table."""
+    __tablename__ = "catalogue_versions"
+
+    name: str = Field(primary_key=True)
+    version: int = Field(sa_column=Column(pg.BIGINT, nullable=False, server_default="0"))
 
     def __repr__(self):
-        return f"<Subject {self.subject_name}>"
\ No newline at end of file
+        return f"<CatalogueVersion {self.name}={self.version}>"
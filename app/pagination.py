@@ -0,0 +1,86 @@
+from fastapi import Query, Response
+from sqlalchemy import tuple_, asc, desc
+from sqlalchemy.orm import InstrumentedAttribute
+from typing import Any, Optional, Sequence
+from datetime import datetime
+import base64
+import binascii
+import json
+import uuid
+from .config import settings
+from .errors import InvalidCursor
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Query parameters shared by every keyset-paginated list route."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(default=None, description="Continuation token from the previous page's X-Next-Cursor header"),
+        limit: int = Query(default=settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    ) -> None:
+        self.cursor = cursor
+        self.limit = limit
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+def _from_json(column: InstrumentedAttribute, value: Any) -> Any:
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type in (datetime, uuid.UUID) and not isinstance(value, str):
+        # uuid.UUID() fails with AttributeError on anything but a string.
+        raise TypeError(f"expected a string for {column.key}")
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    return python_type(value)
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence[InstrumentedAttribute]) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+        return tuple(_from_json(column, value) for column, value in zip(columns, values))
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor()
+
+def paginate(statement, columns: Sequence[InstrumentedAttribute], cursor: Optional[str] = None, limit: Optional[int] = None, descending: bool = True):
+    """Applies a stable keyset order on `columns` and resumes after `cursor`.
+
+    `columns` must end with a unique column so that rows sharing the leading
+    values are still strictly ordered.
+    """
+    direction = desc if descending else asc
+    statement = statement.order_by(*(direction(column) for column in columns))
+
+    if cursor is not None:
+        key = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, columns))
+        statement = statement.where(key < values if descending else key > values)
+
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    return statement
+
+def set_next_cursor(response: Response, rows: Sequence[Any], columns: Sequence[InstrumentedAttribute], limit: int) -> None:
+    """Sets X-Next-Cursor when the page is full, so the client knows to ask for more."""
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, column.key) for column in columns])
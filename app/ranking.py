@@ -0,0 +1,117 @@
+"""Vectorised aggregates and rankings over the results of a whole exam year.
+
+Results are held as a candidates x subjects matrix of small-int grade
+codes: 0 where the candidate has no grade in that subject, otherwise the
+1-based position of the grade in the grade scale. Every figure below is
+computed with whole-array NumPy operations, never per candidate.
+"""
+from typing import Dict, List, Sequence
+import numpy as np
+
+
+def grade_lookup_tables(grade_points: Dict[str, int], pass_grades: Sequence[str]):
+    """Returns (points, passes) arrays indexed by grade code; code 0 scores nothing."""
+    points = np.array([0, *grade_points.values()], dtype=np.int16)
+    passes = np.array([False, *(grade in pass_grades for grade in grade_points)], dtype=bool)
+    return points, passes
+
+
+def competition_rank(values: np.ndarray, groups: np.ndarray, n_groups: int, mask: np.ndarray) -> np.ndarray:
+    """
+    Ranks non-negative integer `values` from highest to lowest within each group.
+
+    Ties share a rank and leave a gap after it (1, 2, 2, 4). Counting is
+    done with one bincount over (group, value) pairs, so the cost is linear
+    in the number of candidates.
+
+    Args:
+        values (np.ndarray): Scores to rank, as non-negative integers.
+        groups (np.ndarray): Group index of each candidate, in range(n_groups).
+        n_groups (int): The number of groups.
+        mask (np.ndarray): Candidates to rank; the rest get rank 0.
+
+    Returns:
+        np.ndarray: int32 ranks, 0 where `mask` is False.
+    """
+    ranks = np.zeros(len(values), dtype=np.int32)
+    if not mask.any():
+        return ranks
+
+    width = int(values[mask].max()) + 1
+    ranked_groups = groups[mask].astype(np.int64)
+    ranked_values = values[mask].astype(np.int64)
+
+    counts = np.bincount(ranked_groups * width + ranked_values, minlength=n_groups * width).reshape(n_groups, width)
+    at_or_above = np.cumsum(counts[:, ::-1], axis=1)[:, ::-1]
+    above = at_or_above - counts
+
+    ranks[mask] = 1 + above[ranked_groups, ranked_values]
+    return ranks
+
+
+def compute_aggregates(
+    grades: np.ndarray,
+    centres: np.ndarray,
+    n_centres: int,
+    points_table: np.ndarray,
+    pass_table: np.ndarray,
+    min_passes: int,
+    required_subjects: List[int],
+) -> Dict[str, np.ndarray]:
+    """
+    Computes per-candidate aggregates and per-subject ranks for one exam year.
+
+    A candidate passes overall with at least `min_passes` subject passes,
+    including every subject in `required_subjects`. Overall ranks order
+    candidates by total points; subject ranks by the points in that subject.
+
+    Args:
+        grades (np.ndarray): candidates x subjects grade codes.
+        centres (np.ndarray): Centre index of each candidate, in range(n_centres).
+        n_centres (int): The number of centres.
+        points_table (np.ndarray): Points per grade code.
+        pass_table (np.ndarray): Whether each grade code is a pass.
+        min_passes (int): Subject passes needed to pass overall.
+        required_subjects (List[int]): Columns of subjects that must be passed.
+
+    Returns:
+        Dict[str, np.ndarray]: Per-candidate "subjects_taken", "subjects_passed",
+        "total_points", "average_points" (NaN with no grades), "passed",
+        "national_rank" and "centre_rank", and candidates x subjects "points",
+        "graded", "subject_national_rank" and "subject_centre_rank".
+    """
+    n_candidates, n_subjects = grades.shape
+    nation = np.zeros(n_candidates, dtype=np.int32)
+
+    points = points_table[grades]
+    graded = grades > 0
+    subject_passes = pass_table[grades]
+
+    subjects_taken = graded.sum(axis=1, dtype=np.int32)
+    subjects_passed = subject_passes.sum(axis=1, dtype=np.int32)
+    total_points = points.sum(axis=1, dtype=np.int32)
+    average_points = np.divide(
+        total_points, subjects_taken, out=np.full(n_candidates, np.nan), where=subjects_taken > 0
+    )
+    passed = (subjects_passed >= min_passes) & subject_passes[:, required_subjects].all(axis=1)
+
+    has_results = subjects_taken > 0
+    subject_national_rank = np.zeros((n_candidates, n_subjects), dtype=np.int32)
+    subject_centre_rank = np.zeros((n_candidates, n_subjects), dtype=np.int32)
+    for subject in range(n_subjects):
+        subject_national_rank[:, subject] = competition_rank(points[:, subject], nation, 1, graded[:, subject])
+        subject_centre_rank[:, subject] = competition_rank(points[:, subject], centres, n_centres, graded[:, subject])
+
+    return {
+        "subjects_taken": subjects_taken,
+        "subjects_passed": subjects_passed,
+        "total_points": total_points,
+        "average_points": average_points,
+        "passed": passed,
+        "national_rank": competition_rank(total_points, nation, 1, has_results),
+        "centre_rank": competition_rank(total_points, centres, n_centres, has_results),
+        "points": points,
+        "graded": graded,
+        "subject_national_rank": subject_national_rank,
+        "subject_centre_rank": subject_centre_rank,
+    }
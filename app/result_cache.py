@@ -0,0 +1,293 @@
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+from contextlib import contextmanager
+import asyncio
+import logging
+import time
+from .cache import TTLCache
+from .config import settings
+from .db.main import async_session_maker
+from .listener import ChannelListener, channel_listener, notify
+
+NOTIFY_CHANNEL = "result_documents_changed"
+
+
+class CachedDocument(NamedTuple):
+    """A serialised response together with its validators."""
+    etag: str
+    last_modified: Optional[str]
+    body: bytes
+
+    def pack(self) -> bytes:
+        return b"\n".join([self.etag.encode(), (self.last_modified or "").encode(), self.body])
+
+    @classmethod
+    def unpack(cls, raw: bytes) -> "CachedDocument":
+        etag, last_modified, body = raw.split(b"\n", 2)
+        return cls(etag.decode(), last_modified.decode() or None, body)
+
+
+class LocalCacheBackend:
+    """In-process LRU backend. Each worker process keeps its own copy.
+
+    Deletes are sent to the other workers as a NOTIFY on NOTIFY_CHANNEL
+    carrying the deleted keys, or an empty payload to clear everything.
+    Every worker's channel listener applies them to its own copy. As with
+    the centre registry, entries are only stored while the listener is
+    connected, and the copy is emptied whenever it (re)connects or drops.
+    `on_delete`, when set, is called with the keys another worker deleted,
+    or None whenever the whole copy is emptied.
+    """
+
+    # pg_notify payloads must stay under 8000 bytes.
+    MAX_PAYLOAD = 7900
+
+    def __init__(self, maxsize: int, ttl: float, listener: ChannelListener) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.listener = listener
+        self.on_delete: Optional[Callable[[Optional[List[str]]], None]] = None
+        listener.subscribe(NOTIFY_CHANNEL, self._on_notify, self._reset)
+
+    def _reset(self) -> None:
+        self._cache.clear()
+        if self.on_delete is not None:
+            self.on_delete(None)
+
+    def _on_notify(self, payload: str) -> None:
+        if not payload:
+            self._reset()
+            return
+        keys = payload.split("\n")
+        for key in keys:
+            self._cache.delete(key)
+        if self.on_delete is not None:
+            self.on_delete(keys)
+
+    def _payloads(self, keys: List[str]) -> List[str]:
+        payloads, batch, size = [], [], 0
+        for key in keys:
+            if batch and size + len(key) + 1 > self.MAX_PAYLOAD:
+                payloads.append("\n".join(batch))
+                batch, size = [], 0
+            batch.append(key)
+            size += len(key) + 1
+        if batch:
+            payloads.append("\n".join(batch))
+        return payloads
+
+    async def _broadcast(self, *payloads: str) -> None:
+        async with async_session_maker() as session:
+            await notify(session, NOTIFY_CHANNEL, *payloads)
+            await session.commit()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if self.listener.listening:
+            self._cache.set(key, value, expires_at=time.time() + ttl)
+
+    async def delete(self, keys: List[str]) -> None:
+        for key in keys:
+            self._cache.delete(key)
+        if keys:
+            await self._broadcast(*self._payloads(keys))
+
+    async def clear(self, prefix: str) -> None:
+        self._cache.clear()
+        await self._broadcast("")
+
+
+class RedisCacheBackend:
+    """Redis backend shared by every worker.
+
+    redis.asyncio is imported on first use, unless a client is passed in.
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None) -> None:
+        self.url = url
+        self._client = client
+
+    def _get_client(self):
+        if self._client is None:
+            import redis.asyncio
+
+            self._client = redis.asyncio.from_url(self.url)
+        return self._client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._get_client().get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._get_client().set(key, value, ex=max(int(ttl), 1))
+
+    async def delete(self, keys: List[str]) -> None:
+        if keys:
+            await self._get_client().delete(*keys)
+
+    async def clear(self, prefix: str) -> None:
+        client = self._get_client()
+        batch = []
+        async for key in client.scan_iter(match=f"{prefix}*"):
+            batch.append(key)
+            if len(batch) >= 1000:
+                await client.delete(*batch)
+                batch = []
+        if batch:
+            await client.delete(*batch)
+
+
+class ResultDocumentCache:
+    """Read-through cache of serialised result responses and their validators, keyed by exam ID.
+
+    Each route caches its own view of a student under its own key, and
+    invalidating an exam ID drops every view of it. A backend error is
+    logged and treated as a miss, so the cache can never fail a read.
+
+    A load that started before an invalidation can finish after it and
+    store what it read. Loads therefore run inside loading(), which yields
+    the exam ID's generation; invalidate() bumps the generation of every
+    exam ID being loaded, and set() drops a document whose generation has
+    moved on. Generations are only kept while a load is in flight. With the
+    local backend, invalidations from other workers bump them too.
+
+    With a read replica, a read racing an invalidation can refill the cache
+    from a replica that has not caught up, so invalidations are repeated once
+    `replica_lag` seconds later.
+    """
+
+    PREFIX = "result:"
+    VIEWS = ("student", "candidate")
+    DELETE_BATCH_SIZE = 1000
+
+    def __init__(self, backend, ttl: float, replica_lag: float = 0) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.replica_lag = replica_lag
+        self._pending: set = set()
+        self._loading: Dict[str, int] = {}
+        self._generations: Dict[str, int] = {}
+        if isinstance(backend, LocalCacheBackend):
+            backend.on_delete = self._on_backend_delete
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations = 0
+        self.stale_loads = 0
+
+    def _key(self, view: str, exam_id: str) -> str:
+        return f"{self.PREFIX}{view}:{exam_id}"
+
+    @contextmanager
+    def loading(self, exam_id: str) -> Iterator[int]:
+        """Marks a load of `exam_id` in flight and yields the generation to pass to set()."""
+        self._loading[exam_id] = self._loading.get(exam_id, 0) + 1
+        try:
+            yield self._generations.get(exam_id, 0)
+        finally:
+            self._loading[exam_id] -= 1
+            if not self._loading[exam_id]:
+                del self._loading[exam_id]
+                self._generations.pop(exam_id, None)
+
+    def _bump(self, exam_ids: Optional[Iterable[str]] = None) -> None:
+        """Bumps the generation of `exam_ids`, or of every exam ID being loaded when None."""
+        for exam_id in list(self._loading) if exam_ids is None else exam_ids:
+            if exam_id in self._loading:
+                self._generations[exam_id] = self._generations.get(exam_id, 0) + 1
+
+    def _on_backend_delete(self, keys: Optional[List[str]]) -> None:
+        if keys is None:
+            self._bump()
+        else:
+            self._bump(key.rsplit(":", 1)[-1] for key in keys if key.startswith(self.PREFIX))
+
+    async def get(self, view: str, exam_id: str) -> Optional[CachedDocument]:
+        try:
+            raw = await self.backend.get(self._key(view, exam_id))
+        except Exception as e:
+            self.errors += 1
+            logging.warning(f"Result cache read failed: {e}")
+            raw = None
+
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedDocument.unpack(raw)
+
+    async def set(self, view: str, exam_id: str, document: CachedDocument, generation: Optional[int] = None) -> None:
+        """Stores `document`, unless `generation`, taken from loading(), is out of date."""
+        if generation is not None and generation != self._generations.get(exam_id, 0):
+            self.stale_loads += 1
+            return
+        try:
+            await self.backend.set(self._key(view, exam_id), document.pack(), self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logging.warning(f"Result cache write failed: {e}")
+
+    async def _delete(self, exam_ids: List[str]) -> None:
+        keys = [self._key(view, exam_id) for exam_id in exam_ids for view in self.VIEWS]
+        try:
+            for start in range(0, len(keys), self.DELETE_BATCH_SIZE):
+                await self.backend.delete(keys[start:start + self.DELETE_BATCH_SIZE])
+        except Exception as e:
+            self.errors += 1
+            logging.warning(f"Result cache invalidation failed: {e}")
+
+    async def _delete_later(self, exam_ids: List[str]) -> None:
+        await asyncio.sleep(self.replica_lag)
+        await self._delete(exam_ids)
+
+    async def invalidate(self, exam_ids: Iterable[str]) -> None:
+        exam_ids = [exam_id for exam_id in exam_ids if exam_id]
+        if not exam_ids:
+            return
+
+        self.invalidations += len(exam_ids)
+        self._bump(exam_ids)
+        await self._delete(exam_ids)
+        if self.replica_lag > 0:
+            task = asyncio.get_running_loop().create_task(self._delete_later(exam_ids))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def clear(self) -> None:
+        self._bump()
+        try:
+            await self.backend.clear(self.PREFIX)
+        except Exception as e:
+            self.errors += 1
+            logging.warning(f"Result cache clear failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "invalidations": self.invalidations,
+            "stale_loads": self.stale_loads,
+        }
+
+
+def _redis_available() -> bool:
+    try:
+        import redis.asyncio  # noqa: F401
+    except ImportError as e:
+        logging.error(f"RESULT_CACHE_BACKEND is redis but redis.asyncio cannot be imported, using the local backend: {e}")
+        return False
+    return True
+
+def build_result_cache() -> ResultDocumentCache:
+    if settings.RESULT_CACHE_BACKEND == "redis" and _redis_available():
+        backend = RedisCacheBackend(settings.REDIS_URL)
+    else:
+        backend = LocalCacheBackend(maxsize=settings.RESULT_CACHE_SIZE, ttl=settings.RESULT_CACHE_TTL, listener=channel_listener)
+
+    replica_lag = settings.REPLICA_READ_YOUR_WRITES_SECONDS if settings.DATABASE_REPLICA_URL else 0
+    return ResultDocumentCache(backend, ttl=settings.RESULT_CACHE_TTL, replica_lag=replica_lag)
+
+
+result_cache = build_result_cache()
@@ -1,13 +1,20 @@
-from fastapi import FastAPI, Header, status, Body, Depends, APIRouter, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Header, status, Body, Depends, APIRouter, HTTPException, BackgroundTasks, Response
 from fastapi.responses import JSONResponse
-from typing import List
-from ..db.main import get_session
+from typing import List, Literal, Optional
+from ..db.main import get_session, get_read_session, get_pool_stats
 from sqlmodel.ext.asyncio.session import AsyncSession
 from ..schemas import AdminLoginModel, AdminProfileModel, EmailModel, AdminCreateModel
-from ..service import AdminService, TokenService, UserService, ExamCentreService, StudentService
-from ..utils import create_access_token, verify_passwd_hash
+from ..service import AdminService, TokenService, UserService, ExamCentreService, StudentService, StatsService, RankingService, ADMIN_PAGE_KEYS
+from ..pagination import PageParams, set_next_cursor
+from ..utils import create_access_token
+from ..hashing import password_hasher
+from ..analytics import analytics_refresher
+from ..result_cache import result_cache
+from ..singleflight import read_flight
+from ..catalogue import subject_catalogue
+from ..centre_registry import centre_registry
 from datetime import timedelta, datetime
-from ..dependencies import AccessTokenBearer, get_current_admin, RoleChecker, check_revoked_token
+from ..dependencies import access_token_bearer, get_current_admin, RoleChecker, check_revoked_token
 from ..errors import InvalidCredentials
 from ..mail import create_message, mail
 from typing import List
@@ -23,6 +30,8 @@ user = UserService()
 exam_centre = ExamCentreService()
 student = StudentService()
 revoked_token = TokenService()
+stats = StatsService()
+ranking = RankingService()
 role_checker = Depends(RoleChecker(['admin', 'super_admin']))
 revoked_token_check = Depends(check_revoked_token)
 
@@ -58,7 +67,7 @@ async def login_admin(login_data: AdminLoginModel = Body(...), session: AsyncSes
 
     existing_admin = await admin.get_admin_by_email(admin_email, session=session)
     if existing_admin is not None:
-        passwd_valid = verify_passwd_hash(password=login_data.password, hashed_password=existing_admin.password)
+        passwd_valid = await password_hasher.verify(password=login_data.password, hashed_password=existing_admin.password)
 
         if passwd_valid:
             access_token = create_access_token(user_data={
@@ -69,7 +78,8 @@ async def login_admin(login_data: AdminLoginModel = Body(...), session: AsyncSes
         
             refresh_token = create_access_token(user_data={
                 'email': existing_admin.email,
-                'user_uid': str(existing_admin.uid)
+                'user_uid': str(existing_admin.uid),
+                'role': existing_admin.role
             },
             refresh=True,
             expiry=timedelta(days=2)
@@ -95,8 +105,9 @@ async def get_user_profile(user = Depends(get_current_admin)):
     return user
 
 @router.get('/all', dependencies=[role_checker, revoked_token_check], response_model=List[AdminProfileModel])
-async def get_user_profile(user = Depends(get_current_admin), session: AsyncSession = Depends(get_session)):
-    admins = await admin.get_all_admins(session=session)
+async def get_user_profile(response: Response, page: PageParams = Depends(), user = Depends(get_current_admin), session: AsyncSession = Depends(get_read_session)):
+    admins = await admin.get_all_admins(session=session, limit=page.limit, cursor=page.cursor)
+    set_next_cursor(response, admins, ADMIN_PAGE_KEYS, page.limit)
     return admins
 
 @router.post('/create/admin', dependencies=[role_checker, revoked_token_check], response_model=AdminProfileModel)
@@ -106,30 +117,91 @@ async def create_an_admin(background_tasks: BackgroundTasks, admin_data: AdminCr
 
 ################################################
 ####################GET COUNT###################
+@router.get('/stats', dependencies=[role_checker, revoked_token_check])
+async def get_dashboard_stats(session: AsyncSession = Depends(get_read_session)):
+    return await stats.get_dashboard_stats(session)
+
 @router.get('/get_all_users', dependencies=[role_checker, revoked_token_check])
-async def get_all_users(session: AsyncSession = Depends(get_session)):
-    users = await user.get_all_users(session)
-    user_count = len(users)
-    return user_count
+async def get_all_users(session: AsyncSession = Depends(get_read_session)):
+    dashboard = await stats.get_dashboard_stats(session)
+    return dashboard["users"]
 
 @router.get('/get_all_centres', dependencies=[role_checker, revoked_token_check])
-async def get_all_centres(session: AsyncSession = Depends(get_session)):
-    centres = await exam_centre.get_all_exam_centres(session)
-    centre_count = len(centres)
-    return centre_count
+async def get_all_centres(session: AsyncSession = Depends(get_read_session)):
+    dashboard = await stats.get_dashboard_stats(session)
+    return dashboard["centres"]
 
 @router.get('/get_all_students', dependencies=[role_checker, revoked_token_check])
-async def get_all_students(session: AsyncSession = Depends(get_session)):
-    students = await student.get_all_students(session)
-    student_count = len(students)
-    return student_count
+async def get_all_students(session: AsyncSession = Depends(get_read_session)):
+    dashboard = await stats.get_dashboard_stats(session)
+    return dashboard["students"]
 ####################GET COUNT#########################
 ######################################################
 
+@router.get('/analytics/grades', dependencies=[role_checker, revoked_token_check])
+async def get_grade_distribution(exam_centre_no: Optional[str] = None, exam_year: Optional[int] = None, subject_code: Optional[str] = None, session: AsyncSession = Depends(get_read_session)):
+    return await stats.get_grade_distribution(session, exam_centre_no, exam_year, subject_code)
+
+@router.get('/analytics/pass_rates', dependencies=[role_checker, revoked_token_check])
+async def get_pass_rates(
+    by: Literal['exam_centre_no', 'exam_year', 'subject_code'] = 'exam_centre_no',
+    exam_centre_no: Optional[str] = None,
+    exam_year: Optional[int] = None,
+    subject_code: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session)
+):
+    return await stats.get_pass_rates(by, session, exam_centre_no, exam_year, subject_code)
+
+@router.get('/analytics/approval_rates', dependencies=[role_checker, revoked_token_check])
+async def get_approval_rates(
+    by: Literal['exam_centre_no', 'exam_year'] = 'exam_centre_no',
+    exam_centre_no: Optional[str] = None,
+    exam_year: Optional[int] = None,
+    session: AsyncSession = Depends(get_read_session)
+):
+    return await stats.get_approval_rates(by, session, exam_centre_no, exam_year)
+
+@router.post('/analytics/refresh', dependencies=[role_checker, revoked_token_check])
+async def refresh_analytics():
+    await analytics_refresher.refresh()
+    return analytics_refresher.stats()
+
+@router.post('/rankings/{exam_year}', dependencies=[role_checker, revoked_token_check])
+async def rank_exam_year(exam_year: int, session: AsyncSession = Depends(get_session)):
+    return await ranking.rank_exam_year(exam_year, session)
+
+@router.get('/metrics/result_cache', dependencies=[role_checker, revoked_token_check])
+async def get_result_cache_metrics():
+    return result_cache.stats()
+
+@router.get('/metrics/centre_registry', dependencies=[role_checker, revoked_token_check])
+async def get_centre_registry_metrics():
+    return centre_registry.stats()
+
+@router.get('/metrics/subject_catalogue', dependencies=[role_checker, revoked_token_check])
+async def get_subject_catalogue_metrics():
+    return subject_catalogue.stats()
+
+@router.get('/metrics/single_flight', dependencies=[role_checker, revoked_token_check])
+async def get_single_flight_metrics():
+    return read_flight.stats()
+
+@router.get('/metrics/analytics', dependencies=[role_checker, revoked_token_check])
+async def get_analytics_metrics():
+    return analytics_refresher.stats()
+
+@router.get('/metrics/password_hashing', dependencies=[role_checker, revoked_token_check])
+async def get_password_hashing_metrics():
+    return password_hasher.stats()
+
+@router.get('/metrics/db_pool', dependencies=[role_checker, revoked_token_check])
+async def get_db_pool_metrics():
+    return get_pool_stats()
+
 @router.get("/logout")
-async def logout_user(token_details: dict = Depends(AccessTokenBearer()), session: AsyncSession = Depends(get_session)):
+async def logout_user(token_details: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
 
-    await revoked_token.add_token_to_blacklist(session=session, token_jti= token_details['jti'])
+    await revoked_token.add_token_to_blacklist(session=session, token_jti= token_details['jti'], expires_at=token_details.get('exp'))
 
     return JSONResponse(
         content={
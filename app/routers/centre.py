@@ -1,11 +1,17 @@
-from fastapi import Depends, APIRouter, status
+from fastapi import Depends, APIRouter, status, Request, Response
 from fastapi.responses import JSONResponse
-from typing import List
-from ..db.main import get_session
+from typing import List, Optional, Tuple
+from ..db.main import get_session, get_read_session
 from sqlmodel.ext.asyncio.session import AsyncSession
 from ..dependencies import RoleChecker, check_revoked_token
-from..service import ExamCentreService
-from ..schemas import ExamCentreCreateModel, ExamCentreResponseModel
+from..service import ExamCentreService, StudentService, EXAM_CENTRE_PAGE_KEYS, STUDENT_PAGE_KEYS
+from ..pagination import PageParams, set_next_cursor
+from ..schemas import ExamCentreCreateModel, ExamCentreResponseModel, CentreStudentResponseModel
+from ..errors import CentreNotFound
+from ..conditional import etag_for_rows, http_date, last_modified_of, set_validators, not_modified
+from ..fast_json import model_response
+from ..fields import FieldSelector
+from ..config import settings
 
 
 router = APIRouter(
@@ -15,8 +21,11 @@ router = APIRouter(
 
 role_checker = Depends(RoleChecker(['admin', 'super_admin']))
 revoked_token_check = Depends(check_revoked_token)
+centre_fields = Depends(FieldSelector(ExamCentreResponseModel))
+centre_student_fields = Depends(FieldSelector(CentreStudentResponseModel))
 
 exam_centre = ExamCentreService()
+student = StudentService()
 
 @router.post('/create', dependencies=[role_checker, revoked_token_check])
 async def create_exam_centre(exam_centre_data: ExamCentreCreateModel, session: AsyncSession = Depends(get_session)):
@@ -24,14 +33,32 @@ async def create_exam_centre(exam_centre_data: ExamCentreCreateModel, session: A
     return result
 
 @router.get('/all', dependencies=[role_checker, revoked_token_check])
-async def get_all_exam_centres(session: AsyncSession = Depends(get_session)):
-    result = await exam_centre.get_all_exam_centres(session=session)
-    return result
+async def get_all_exam_centres(request: Request, response: Response, page: PageParams = Depends(), fields: Optional[Tuple[str, ...]] = centre_fields, session: AsyncSession = Depends(get_read_session)):
+    result = await exam_centre.get_all_exam_centres(session=session, limit=page.limit, cursor=page.cursor, fields=fields)
+    set_next_cursor(response, result, EXAM_CENTRE_PAGE_KEYS, page.limit)
+    set_validators(response, etag_for_rows("centres", result, page.limit, fields), None, settings.CENTRE_CACHE_CONTROL)
+    return not_modified(request, response) or model_response(response, result, ExamCentreResponseModel, fields)
 
 @router.get('/{exam_centre_id}', dependencies=[role_checker, revoked_token_check], response_model=ExamCentreResponseModel)
-async def get_exam_centre_by_exam_centre_id(exam_centre_id: str, session: AsyncSession = Depends(get_session)):
-    result = await exam_centre.get_exam_centre_by_exam_centre_uid(exam_centre_id, session=session)
-    return result
+async def get_exam_centre_by_exam_centre_id(exam_centre_id: str, request: Request, response: Response, fields: Optional[Tuple[str, ...]] = centre_fields):
+    # Served whole from the centre registry, so fields only trims the body.
+    result = await exam_centre.get_shared_exam_centre_by_uid(exam_centre_id)
+    if result is None:
+        raise CentreNotFound()
+
+    set_validators(response, etag_for_rows("centre", [result], fields), http_date(last_modified_of([result])), settings.CENTRE_CACHE_CONTROL)
+    return not_modified(request, response) or model_response(response, result, ExamCentreResponseModel, fields)
+
+@router.get('/{exam_centre_id}/students', dependencies=[role_checker, revoked_token_check], response_model=List[CentreStudentResponseModel])
+async def get_exam_centre_students(exam_centre_id: str, request: Request, response: Response, page: PageParams = Depends(), fields: Optional[Tuple[str, ...]] = centre_student_fields, session: AsyncSession = Depends(get_read_session)):
+    centre = await exam_centre.get_shared_exam_centre_by_uid(exam_centre_id)
+    if centre is None:
+        raise CentreNotFound()
+
+    result = await student.get_students_by_exam_centre_no(centre.exam_centre_no, session=session, limit=page.limit, cursor=page.cursor, fields=fields)
+    set_next_cursor(response, result, STUDENT_PAGE_KEYS, page.limit)
+    set_validators(response, etag_for_rows("centre_students", result, page.limit, fields, settings.RESULTS_READ_FROM_TABLE), None, settings.STUDENT_CACHE_CONTROL)
+    return not_modified(request, response) or model_response(response, result, CentreStudentResponseModel, fields)
 
 @router.put('/{exam_centre_id}', dependencies=[role_checker, revoked_token_check])
 async def update_exam_centre(exam_centre_id: str, exam_centre_data: dict, session: AsyncSession = Depends(get_session)):
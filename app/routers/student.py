@@ -1,11 +1,21 @@
-from fastapi import Depends, APIRouter, status
-from fastapi.responses import JSONResponse
-from typing import List
-from ..db.main import get_session
+from fastapi import Depends, APIRouter, status, Response, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional, Tuple
+from ..db.main import get_session, get_read_session, read_session, async_session_maker
 from sqlmodel.ext.asyncio.session import AsyncSession
 from ..dependencies import RoleChecker
-from..service import StudentService
+from..service import StudentService, ExamCentreService, ResultSheetService, ResultExportService, RankingService, STUDENT_PAGE_KEYS
+from ..pagination import PageParams, set_next_cursor
+from ..models import Student
 from ..schemas import StudentCreateModel, StudentResponseModel
+from ..sheets import iter_sheet_rows, iter_records
+from ..errors import CentreNotFound, StudentNotFound, UnsupportedSheet
+from ..conditional import etag_for_rows, http_date, last_modified_of, set_validators, not_modified, response_headers
+from ..fast_json import model_response
+from ..fields import FieldSelector
+from ..config import settings
+import json
 
 router = APIRouter(
     prefix="/student",
@@ -15,6 +25,39 @@ router = APIRouter(
 role_checker = Depends(RoleChecker(['admin', 'super_admin']))
 
 student = StudentService()
+exam_centre = ExamCentreService()
+result_sheet = ResultSheetService()
+result_export = ResultExportService()
+ranking = RankingService()
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+student_fields = Depends(FieldSelector(StudentResponseModel))
+# GET /{student_uid} returns the Student row itself, not StudentResponseModel.
+student_row_fields = Depends(FieldSelector(Student))
+
+def set_student_validators(response: Response, kind: str, students: list, *extra, fields: Optional[Tuple[str, ...]] = None) -> None:
+    # Student responses embed their centre, so its version counts too.
+    rows = list(students)
+    if fields is None or "exam_centre" in fields:
+        rows += [s.exam_centre for s in students if s.exam_centre is not None]
+    etag = etag_for_rows(kind, rows, *extra, fields, settings.RESULTS_READ_FROM_TABLE)
+    set_validators(response, etag, None, settings.STUDENT_CACHE_CONTROL)
+
+SHEET_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
 
 
 @router.post('/create', dependencies=[role_checker])
@@ -22,20 +65,98 @@ async def create_student(student_data: StudentCreateModel, session: AsyncSession
     result = await student.create_a_student(session, student_data)
     return result
 
+@router.post('/register_bulk', dependencies=[role_checker], openapi_extra=SHEET_UPLOAD_BODY)
+async def register_students_in_bulk(request: Request, session: AsyncSession = Depends(get_session)):
+    form = await request.form(max_files=1)
+    try:
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            raise UnsupportedSheet()
+
+        report = await student.scan_registration_records(iter_records(upload.file, upload.filename), session)
+    except Exception:
+        await form.close()
+        raise
+
+    if report["error_count"]:
+        await form.close()
+        return JSONResponse(content=report, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    await run_in_threadpool(upload.file.seek, 0)
+
+    async def exam_ids():
+        try:
+            async with async_session_maker() as upload_session:
+                async for event in student.bulk_register_students(iter_records(upload.file, upload.filename), upload_session):
+                    yield json.dumps(event) + "\n"
+        finally:
+            await form.close()
+
+    return StreamingResponse(exam_ids(), media_type="application/x-ndjson")
+
 @router.get('/all', dependencies=[role_checker], response_model=List[StudentResponseModel])
-async def get_all_students(session: AsyncSession = Depends(get_session)):
-    result = await student.get_all_students(session)
-    return result
+async def get_all_students(request: Request, response: Response, page: PageParams = Depends(), fields: Optional[Tuple[str, ...]] = student_fields, session: AsyncSession = Depends(get_read_session)):
+    result = await student.get_all_students(session, limit=page.limit, cursor=page.cursor, fields=fields)
+    set_next_cursor(response, result, STUDENT_PAGE_KEYS, page.limit)
+    set_student_validators(response, "students", result, page.limit, fields=fields)
+    return not_modified(request, response) or model_response(response, result, StudentResponseModel, fields)
+
+@router.get('/by_grade/{subject_code}/{grade}', dependencies=[role_checker], response_model=List[StudentResponseModel])
+async def get_students_by_grade(subject_code: str, grade: str, request: Request, response: Response, exam_centre_no: Optional[str] = None, page: PageParams = Depends(), fields: Optional[Tuple[str, ...]] = student_fields, session: AsyncSession = Depends(get_read_session)):
+    result = await student.get_students_by_grade(subject_code, grade, session, exam_centre_no, limit=page.limit, cursor=page.cursor, fields=fields)
+    set_next_cursor(response, result, STUDENT_PAGE_KEYS, page.limit)
+    set_student_validators(response, "students_by_grade", result, page.limit, fields=fields)
+    return not_modified(request, response) or model_response(response, result, StudentResponseModel, fields)
+
+# Declared before /{student_uid} so that "export" is not read as a student uid.
+@router.get('/export', dependencies=[role_checker])
+async def export_student_results(
+    format: Literal['csv', 'ndjson'] = 'csv',
+    exam_centre_no: Optional[str] = None,
+    exam_year: Optional[int] = None,
+    subject_code: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session)
+):
+    if exam_centre_no and await exam_centre.get_shared_exam_centre_by_no(exam_centre_no) is None:
+        raise CentreNotFound()
+    subjects = await result_export.resolve_export_subjects(subject_code, session)
+
+    async def rows():
+        async with read_session() as export_session:
+            async for chunk in result_export.export_results(format, subjects, export_session, exam_centre_no, exam_year, subject_code):
+                yield chunk
+
+    filename = "_".join(["results", *(str(part) for part in (exam_centre_no, exam_year, subject_code) if part)])
+    return StreamingResponse(
+        rows(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
 
 @router.get('/exam_id/{exam_uid}', dependencies=[Depends(RoleChecker(['user', 'admin', 'super_admin']))], response_model=StudentResponseModel)
-async def get_student_by_student_uid(exam_uid: str, session: AsyncSession = Depends(get_session)):
-    result = await student.get_a_student_by_exam_id(exam_uid, session)
+async def get_student_by_student_uid(exam_uid: str, request: Request, response: Response):
+    document = await student.get_result_document(exam_uid)
+    if document is None:
+        raise StudentNotFound()
+
+    set_validators(response, document.etag, document.last_modified, settings.STUDENT_CACHE_CONTROL)
+    return not_modified(request, response) or Response(content=document.body, media_type="application/json", headers=response_headers(response))
+
+@router.get('/exam_id/{exam_uid}/aggregate', dependencies=[Depends(RoleChecker(['user', 'admin', 'super_admin']))])
+async def get_student_aggregate(exam_uid: str, session: AsyncSession = Depends(get_read_session)):
+    result = await ranking.get_candidate_aggregate(exam_uid, session)
     return result
 
 @router.get('/{student_uid}', dependencies=[Depends(RoleChecker(['user', 'admin', 'super_admin']))])
-async def get_student_by_student_uid(student_uid: str, session: AsyncSession = Depends(get_session)):
-    result = await student.get_a_student(student_uid, session)
-    return result
+async def get_student_by_student_uid(student_uid: str, request: Request, response: Response, fields: Optional[Tuple[str, ...]] = student_row_fields, session: AsyncSession = Depends(get_read_session)):
+    result = await student.get_a_student(student_uid, session, fields=fields)
+    if result is None:
+        raise StudentNotFound()
+
+    set_validators(response, etag_for_rows("student", [result], fields, settings.RESULTS_READ_FROM_TABLE), http_date(last_modified_of([result])), settings.STUDENT_CACHE_CONTROL)
+    if fields is None:
+        return not_modified(request, response) or result
+    return not_modified(request, response) or model_response(response, result, Student, fields)
 
 @router.put('/update/{student_uid}', dependencies=[role_checker])
 async def update_student(student_uid: str, student_data: dict, session: AsyncSession = Depends(get_session)):
@@ -47,6 +168,36 @@ async def update_student_results(exam_centre_no: str, subject_code: str, result_
     result = await student.update_student_results(exam_centre_no, subject_code, result_data, session)
     return result
 
+# The form is parsed here rather than through a File() parameter because
+# FastAPI closes uploaded files before a streaming body runs.
+@router.post('/upload_results', dependencies=[role_checker], openapi_extra=SHEET_UPLOAD_BODY)
+async def upload_student_results(request: Request, exam_centre_no: Optional[str] = None, session: AsyncSession = Depends(get_session)):
+    form = await request.form(max_files=1)
+    try:
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            raise UnsupportedSheet()
+
+        if exam_centre_no and await exam_centre.get_exam_centre_by_exam_centre_no(exam_centre_no, session) is None:
+            raise CentreNotFound()
+
+        rows = iter_sheet_rows(upload.file, upload.filename)
+        header = await run_in_threadpool(next, rows, [])
+        subject_names = await result_sheet.resolve_sheet_subjects(header, session)
+    except Exception:
+        await form.close()
+        raise
+
+    async def progress():
+        try:
+            async with async_session_maker() as upload_session:
+                async for event in result_sheet.ingest_result_sheet(rows, subject_names, exam_centre_no, upload_session):
+                    yield json.dumps(event) + "\n"
+        finally:
+            await form.close()
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
 @router.delete('/delete/{student_uid}', dependencies=[role_checker], status_code=status.HTTP_204_NO_CONTENT)
 async def delete_student(student_uid: str, session: AsyncSession = Depends(get_session)):
     result = await student.delete_a_student(student_uid, session)
@@ -1,11 +1,15 @@
-from fastapi import Depends, APIRouter, status
+from fastapi import Depends, APIRouter, status, Request, Response
 from fastapi.responses import JSONResponse
 from typing import List
 from ..db.main import get_session
 from sqlmodel.ext.asyncio.session import AsyncSession
 from ..dependencies import RoleChecker
-from..service import SubjectService
+from..service import SubjectService, SUBJECT_PAGE_KEYS
+from ..pagination import PageParams, set_next_cursor
 from ..schemas import SubjectCreateModel, SubjectResponseModel
+from ..errors import SubjectNotFound
+from ..conditional import etag_for_rows, http_date, last_modified_of, set_validators, not_modified, response_headers
+from ..config import settings
 
 router = APIRouter(
     prefix="/subject",
@@ -22,14 +26,20 @@ async def create_subject(subject_data: SubjectCreateModel, session: AsyncSession
     return new_subject
 
 @router.get("/all", dependencies=[role_checker], response_model=List[SubjectResponseModel])
-async def get_all_subjects(session: AsyncSession = Depends(get_session)):
-    all_subjects = await subject.get_all_subjects(session)
-    return all_subjects
+async def get_all_subjects(request: Request, response: Response, page: PageParams = Depends()):
+    all_subjects, body = await subject.get_all_subjects(limit=page.limit, cursor=page.cursor)
+    set_next_cursor(response, all_subjects, SUBJECT_PAGE_KEYS, page.limit)
+    set_validators(response, etag_for_rows("subjects", all_subjects, page.limit), None, settings.SUBJECT_CACHE_CONTROL)
+    return not_modified(request, response) or Response(content=body, media_type="application/json", headers=response_headers(response))
 
 @router.get("/{subject_code}", dependencies=[role_checker])
-async def get_subject_by_code(subject_code: str, session: AsyncSession = Depends(get_session)):
-    subject = await subject.get_subject_by_code(subject_code, session)
-    return subject
+async def get_subject_by_code(subject_code: str, request: Request, response: Response):
+    result = await subject.get_subject_by_code(subject_code)
+    if result is None:
+        raise SubjectNotFound()
+
+    set_validators(response, etag_for_rows("subject", [result]), http_date(last_modified_of([result])), settings.SUBJECT_CACHE_CONTROL)
+    return not_modified(request, response) or result
 
 @router.put("/{subject_uid}", dependencies=[role_checker])
 async def update_subject(subject_uid: str, subject_data: SubjectCreateModel, session: AsyncSession = Depends(get_session)):
@@ -1,16 +1,18 @@
-from fastapi import FastAPI, Header, status, Body, Depends, APIRouter, BackgroundTasks
+from fastapi import FastAPI, Header, status, Body, Depends, APIRouter, BackgroundTasks, Request, Response
 from fastapi.responses import JSONResponse, RedirectResponse
 from typing import List
-from ..db.main import get_session
+from ..db.main import get_session, get_read_session
 from sqlmodel.ext.asyncio.session import AsyncSession
 from ..schemas import UserCreateModel, UserResponseModel, UserLoginModel, EmailModel
 from ..service import UserService, TokenService, StudentService
-from ..utils import create_access_token, decode_token, verify_passwd_hash, decode_safe_url
+from ..utils import create_access_token, decode_token, decode_safe_url
+from ..hashing import password_hasher
 from datetime import timedelta, datetime
-from ..dependencies import RefreshTokenBearer, AccessTokenBearer, get_current_user, RoleChecker,check_revoked_token
-from ..errors import InvalidToken, InvalidCredentials, UserNotFound
+from ..dependencies import refresh_token_bearer, access_token_bearer, get_current_user, RoleChecker,check_revoked_token, resolve_principal
+from ..errors import InvalidToken, InvalidCredentials, UserNotFound, StudentNotFound
 from ..mail import create_message, mail
 from ..config import settings
+from ..conditional import set_validators, not_modified, response_headers
 
 router = APIRouter(
     prefix="/user",
@@ -56,7 +58,7 @@ async def login_user(login_data: UserLoginModel = Body(...), session: AsyncSessi
     existing_user = await user.get_user_by_email(user_email, session)
 
     if existing_user is not None:
-        passwd_valid = verify_passwd_hash(password=login_data.password, hashed_password=existing_user.password)
+        passwd_valid = await password_hasher.verify(password=login_data.password, hashed_password=existing_user.password)
 
         if passwd_valid:
             access_token = create_access_token(user_data={
@@ -67,7 +69,8 @@ async def login_user(login_data: UserLoginModel = Body(...), session: AsyncSessi
         
             refresh_token = create_access_token(user_data={
                 'email': existing_user.email,
-                'user_uid': str(existing_user.uid)
+                'user_uid': str(existing_user.uid),
+                'role': existing_user.role
             },
             refresh=True,
             expiry=timedelta(days=2)
@@ -104,28 +107,30 @@ async def request_student_approval(current_user = Depends(get_current_user), ses
     return result
 
 @router.get('/get_student_result', dependencies=[role_checker, revoked_token_check])
-async def get_student_result(current_user = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
-    result = await student.get_a_student_by_exam_id(current_user.exam_id, session)
+async def get_student_result(request: Request, response: Response, current_user = Depends(get_current_user)):
+    if current_user.exam_id is None:
+        raise StudentNotFound()
 
-    if result.is_approved is False:
-        return JSONResponse(
-            content={
-                "message": "Your result is not yet approved. Please request verification"
-            }
-        )
-    
-    else:
-        return result
+    document = await user.get_candidate_result_document(current_user.exam_id)
+    set_validators(response, document.etag, document.last_modified, settings.STUDENT_CACHE_CONTROL)
+    return not_modified(request, response) or Response(content=document.body, media_type="application/json", headers=response_headers(response))
 
 @router.get('/refresh_token')
-async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer())):
+async def get_new_access_token(token_details: dict = Depends(refresh_token_bearer), session: AsyncSession = Depends(get_session)):
 
     expiry_timestamp = token_details['exp']
 
     if datetime.fromtimestamp(expiry_timestamp) > datetime.now():
-        new_access_token = create_access_token(
-            user_data=token_details['user']
-        )
+        # The role is re-read so a refreshed token carries the current one.
+        principal = await resolve_principal(token_details['user'], session)
+        if principal is None:
+            raise InvalidToken()
+
+        new_access_token = create_access_token(user_data={
+            'email': principal.email,
+            'user_uid': str(principal.uid),
+            'role': principal.role
+        })
 
         return JSONResponse(
             content={
@@ -136,9 +141,9 @@ async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer(
     raise InvalidToken()
 
 @router.get("/logout")
-async def logout_user(token_details: dict = Depends(AccessTokenBearer()), session: AsyncSession = Depends(get_session)):
+async def logout_user(token_details: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session)):
 
-    await revoked_token.add_token_to_blacklist(session=session, token_jti= token_details['jti'])
+    await revoked_token.add_token_to_blacklist(session=session, token_jti= token_details['jti'], expires_at=token_details.get('exp'))
 
     return JSONResponse(
         content={
@@ -54,13 +54,15 @@ class StudentCreateModel(BaseModel):
     exam_year: int
     result: Optional[dict] = None
 
-class StudentResponseModel(BaseModel):
+class CentreStudentResponseModel(BaseModel):
     first_name: str
     last_name: str
     exam_centre_no: str 
     exam_id: str
     exam_year: int
     result: Optional[dict] = None
+
+class StudentResponseModel(CentreStudentResponseModel):
     exam_centre: Optional['ExamCentreProfileModel']
 
 # CENTRES
@@ -88,7 +90,7 @@ class ExamCentreProfileModel(BaseModel):
     exam_centre_name: str
 
 class ExamCentreResponseModel(ExamCentre):
-    students: List['StudentResponseModel']
+    pass
 
   
 # ADMIN
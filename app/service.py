@@ -1,18 +1,78 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Body, HTTPException, status, BackgroundTasks
 import logging
-from .schemas import RevokedTokenModel, UserCreateModel, StudentCreateModel, ExamCentreCreateModel, AdminCreateModel, SubjectCreateModel
-from .models import RevokedToken, Student, User, ExamCentre, Admin, Subject
-from sqlmodel import select, desc
-from .utils import generate_passwd_hash, create_safe_url
-from .errors import (UserAlreadyExists, AdminAlreadyExists, UserNotFound, ExamIdNotFound, CenterNoNotFound, StudentAlreadyExists, StudentNotFound, CentreAlreadyExists, CentreNotFound, SubjectNotFound, SubjectAlreadyExists)
+from .schemas import RevokedTokenModel, UserCreateModel, StudentCreateModel, StudentResponseModel, ExamCentreCreateModel, AdminCreateModel, SubjectCreateModel
+from .models import RevokedToken, Student, StudentResult, ResultAggregate, SubjectRanking, User, ExamCentre, Admin, Subject
+from sqlmodel import select
+from sqlalchemy import func, JSON, String, any_, cast, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import raiseload
+from sqlalchemy.orm.attributes import set_committed_value
+from .utils import create_safe_url
+from .hashing import password_hasher
+from .errors import (UserAlreadyExists, AdminAlreadyExists, UserNotFound, ExamIdNotFound, CenterNoNotFound, StudentAlreadyExists, StudentNotFound, CentreAlreadyExists, CentreNotFound, SubjectNotFound, SubjectAlreadyExists, InvalidSheetHeader, ResultsNotRanked)
+from .sheets import is_undecodable, next_chunk
+from .codes import exam_id_codes, exam_centre_codes, subject_codes
+from .ranking import grade_lookup_tables, compute_aggregates
+from starlette.concurrency import run_in_threadpool
 from .config import settings
 from .mail import create_message, mail
+from .cache import TTLCache
+from .analytics import analytics_refresher
+from .result_cache import result_cache, CachedDocument
+from .conditional import make_etag, row_version, last_modified_of, http_date
+from .singleflight import read_flight
+from .catalogue import subject_catalogue
+from .centre_registry import centre_registry
+from .db.main import read_session
+from .db.views import grade_distribution, centre_approvals
+from .pagination import paginate, decode_cursor
+from .fields import column_options
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from collections import Counter
+from itertools import repeat
+from pydantic import ValidationError
+from datetime import datetime
+import csv
+import io
+import json
+import numpy as np
 import uuid
+import time
+
+dashboard_stats_cache = TTLCache(maxsize=1, ttl=settings.DASHBOARD_STATS_CACHE_TTL)
+
+# Keyset sort keys for the paginated listings, newest first.
+USER_PAGE_KEYS = (User.created_at, User.uid)
+STUDENT_PAGE_KEYS = (Student.created_at, Student.uid)
+EXAM_CENTRE_PAGE_KEYS = (ExamCentre.created_at, ExamCentre.uid)
+ADMIN_PAGE_KEYS = (Admin.created_at, Admin.uid)
+SUBJECT_PAGE_KEYS = (Subject.subject_name, Subject.uid)
+
+async def shared_read(key: tuple, load):
+    """Runs `load(session)` once for all concurrent callers with the same key.
+
+    The shared call gets its own read session, since the request that
+    started it may finish or disconnect before the others are served. Only
+    use it for reads whose result is not modified afterwards.
+    """
+    async def run():
+        async with read_session() as session:
+            return await load(session)
+
+    return await read_flight.do(key, run)
+
+# Maps token jti -> True (revoked) or False (known good). Revoked entries live
+# until the token itself expires; known-good entries are kept briefly because
+# a logout handled by another worker only reaches this one through the DB.
+revoked_token_cache = TTLCache(
+    maxsize=settings.REVOKED_TOKEN_CACHE_SIZE,
+    ttl=settings.REVOKED_TOKEN_CACHE_TTL
+)
 
 
 class TokenService:
-    async def add_token_to_blacklist(self, session:AsyncSession, token_jti: RevokedTokenModel):
+    async def add_token_to_blacklist(self, session:AsyncSession, token_jti: RevokedTokenModel, expires_at: Optional[float] = None):
         try:
             new_revoked_token = RevokedToken(
                 token_jti= token_jti
@@ -21,19 +81,35 @@ class TokenService:
             session.add(new_revoked_token)
             await session.commit()
 
+            revoked_token_cache.set(token_jti, True, expires_at=expires_at)
+
             return new_revoked_token
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error is {e}")
 
-    async def get_token_from_blacklist(self, session:AsyncSession, token_jti: RevokedTokenModel) -> bool:
+    async def get_token_from_blacklist(self, session:AsyncSession, token_jti: RevokedTokenModel, expires_at: Optional[float] = None) -> bool:
+        cached = revoked_token_cache.get(token_jti)
+        if cached is not None:
+            return True if cached else None
+
         try:
             statement = select(RevokedToken).where(RevokedToken.token_jti == token_jti)
 
             result = await session.exec(statement)
-            return True if result.first() else None
+            is_revoked = result.first() is not None
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error is {e}")
 
+        if is_revoked:
+            revoked_token_cache.set(token_jti, True, expires_at=expires_at)
+        else:
+            revoked_token_cache.set(
+                token_jti,
+                False,
+                expires_at=min(time.time() + settings.VALID_TOKEN_CACHE_TTL, expires_at or float("inf"))
+            )
+        return True if is_revoked else None
+
 class UserService:
     async def get_student_by_exam_id(self, exam_id: str, session: AsyncSession):
         
@@ -62,8 +138,8 @@ class UserService:
         return result.first() if True else None
         
     
-    async def get_all_users(self, session: AsyncSession):
-        statement = select(User).order_by(desc(User.created_at))
+    async def get_all_users(self, session: AsyncSession, limit: Optional[int] = None, cursor: Optional[str] = None):
+        statement = paginate(select(User), USER_PAGE_KEYS, cursor, limit)
 
         result = await session.exec(statement)
         return result.all() if result else None
@@ -76,6 +152,36 @@ class UserService:
             return user
         raise UserNotFound()
     
+    async def get_candidate_result_document(self, exam_id: str) -> CachedDocument:
+        """Returns the serialised result a candidate sees and its validators, read through the result cache.
+
+        Concurrent misses for the same exam ID share one load.
+        """
+        document = await result_cache.get("candidate", exam_id)
+        if document is not None:
+            return document
+
+        return await shared_read(("candidate_document", exam_id), lambda session: self._load_candidate_result_document(exam_id, session))
+
+    async def _load_candidate_result_document(self, exam_id: str, session: AsyncSession) -> CachedDocument:
+        with result_cache.loading(exam_id) as generation:
+            student = await StudentService().get_a_student_by_exam_id(exam_id, session)
+            if student is None:
+                raise StudentNotFound()
+
+            if student.is_approved is False:
+                body = json.dumps({"message": "Your result is not yet approved. Please request verification"}).encode()
+            else:
+                body = student.model_dump_json().encode()
+
+            document = CachedDocument(
+                etag=make_etag("candidate", student.uid, row_version(student), settings.RESULTS_READ_FROM_TABLE),
+                last_modified=http_date(row_version(student)),
+                body=body,
+            )
+            await result_cache.set("candidate", exam_id, document, generation)
+            return document
+
     async def request_approval(self, user_uid: str, exam_id: str, session: AsyncSession):
         student = await StudentService().get_a_student_by_exam_id(exam_id, session)
         if not student:
@@ -88,6 +194,8 @@ class UserService:
         if user.is_paid and not student.is_approved:
             student.is_approved = True
             await session.commit()
+            analytics_refresher.schedule()
+            await result_cache.invalidate([student.exam_id])
             return student
 
         else:
@@ -104,7 +212,7 @@ class UserService:
         new_user = User(
             **user_data_dict
         )
-        new_user.password = generate_passwd_hash(new_user.password)
+        new_user.password = await password_hasher.hash(new_user.password)
 
         #######################
         safe_url = create_safe_url( str(new_user.uid), new_user.email)
@@ -167,15 +275,60 @@ class UserService:
             raise UserNotFound()
     
 class StudentService:
-    async def get_a_student(self, uid: str, session: AsyncSession):
-        statement = select(Student).where(Student.uid == uid)
+    async def get_result_documents(self, student_uids: List[uuid.UUID], session: AsyncSession) -> Dict[uuid.UUID, dict]:
+        """Assembles {subject_name: grade} documents from student_results, keyed by student uid."""
+        statement = (
+            select(StudentResult.student_uid, Subject.subject_name, StudentResult.grade)
+            .join(Subject, Subject.subject_code == StudentResult.subject_code)
+            .where(StudentResult.student_uid == any_(cast(list(student_uids), ARRAY(UUID(as_uuid=True)))))
+        )
+        result = await session.exec(statement)
+
+        documents = {}
+        for student_uid, subject_name, grade in result.all():
+            documents.setdefault(student_uid, {})[subject_name] = grade
+        return documents
+
+    async def _read_results_from_table(self, students: List[Student], session: AsyncSession, fields: Optional[Sequence[str]] = None) -> None:
+        if not settings.RESULTS_READ_FROM_TABLE or not students:
+            return
+        if fields is not None and "result" not in fields:
+            return
+
+        documents = await self.get_result_documents([student.uid for student in students], session)
+        for student in students:
+            # Not an edit: the loaded value is replaced without marking the row dirty.
+            set_committed_value(student, "result", documents.get(student.uid, {}))
+
+    async def _sync_result_rows(self, student_uids: List[uuid.UUID], session: AsyncSession) -> None:
+        """Rewrites the student_results rows of these students from their result documents."""
+        params = {"student_uids": [str(uid) for uid in student_uids]}
+
+        await session.exec(text("""
+            DELETE FROM student_results WHERE student_uid = ANY(CAST(:student_uids AS uuid[]))
+        """), params=params)
+        await session.exec(text("""
+            INSERT INTO student_results (student_uid, subject_code, grade, updated_at)
+            SELECT s.uid, sub.subject_code, r.value, COALESCE(s.updated_at, s.created_at)
+            FROM students AS s
+            CROSS JOIN LATERAL jsonb_each_text(CASE WHEN jsonb_typeof(s.result) = 'object' THEN s.result ELSE '{}'::jsonb END) AS r
+            JOIN subjects AS sub ON sub.subject_name = r.key
+            WHERE s.uid = ANY(CAST(:student_uids AS uuid[]))
+              AND r.value IS NOT NULL
+        """), params=params)
+
+    async def get_a_student(self, uid: str, session: AsyncSession, fields: Optional[Sequence[str]] = None):
+        statement = select(Student).where(Student.uid == uid).options(*column_options(Student, fields))
 
         result = await session.exec(statement)
 
         if result is None:
             raise StudentNotFound()
         
-        return result.first() 
+        student = result.first()
+        if student is not None:
+            await self._read_results_from_table([student], session, fields)
+        return student
 
     async def get_a_student_by_exam_id(self, exam_id: str, session: AsyncSession):
         statement = select(Student).where(Student.exam_id == exam_id)
@@ -184,48 +337,229 @@ class StudentService:
 
         if result is None:
             raise StudentNotFound()
-        return result.first() 
+        student = result.first()
+        if student is not None:
+            await self._read_results_from_table([student], session)
+        return student
         
-    async def get_all_students(self, session: AsyncSession):
-            statement = select(Student).order_by(desc(Student.created_at))
+    async def _load_result_document(self, exam_id: str, session: AsyncSession) -> Optional[CachedDocument]:
+        with result_cache.loading(exam_id) as generation:
+            student = await self.get_a_student_by_exam_id(exam_id, session)
+            if student is None:
+                return None
+
+            rows = [student, student.exam_centre] if student.exam_centre is not None else [student]
+            document = CachedDocument(
+                etag=make_etag("student", *(row_version(row) for row in rows), student.uid, settings.RESULTS_READ_FROM_TABLE),
+                last_modified=http_date(last_modified_of(rows)),
+                body=StudentResponseModel.model_validate(student, from_attributes=True).model_dump_json().encode(),
+            )
+            await result_cache.set("student", exam_id, document, generation)
+            return document
+
+    async def get_result_document(self, exam_id: str) -> Optional[CachedDocument]:
+        """Returns a student serialised as StudentResponseModel and its validators, read through the result cache.
+
+        Concurrent misses for the same exam ID share one load.
+        """
+        document = await result_cache.get("student", exam_id)
+        if document is not None:
+            return document
+
+        return await shared_read(("student_document", exam_id), lambda session: self._load_result_document(exam_id, session))
+
+    async def get_students_by_exam_centre_no(self, exam_centre_no: str, session: AsyncSession, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None):
+        # Every row shares the same centre, so the centre join is skipped.
+        statement = (
+            select(Student)
+            .where(Student.exam_centre_no == exam_centre_no)
+            .options(raiseload(Student.exam_centre), *column_options(Student, fields))
+        )
+        statement = paginate(statement, STUDENT_PAGE_KEYS, cursor, limit)
+
+        result = await session.exec(statement)
+        students = result.all()
+        await self._read_results_from_table(students, session, fields)
+        return students
+
+    async def get_students_by_grade(self, subject_code: str, grade: str, session: AsyncSession, exam_centre_no: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None):
+        statement = (
+            select(Student)
+            .join(StudentResult, StudentResult.student_uid == Student.uid)
+            .where(StudentResult.subject_code == subject_code, StudentResult.grade == grade)
+            .options(*column_options(Student, fields))
+        )
+        if exam_centre_no:
+            statement = statement.where(Student.exam_centre_no == exam_centre_no)
+        statement = paginate(statement, STUDENT_PAGE_KEYS, cursor, limit)
+
+        result = await session.exec(statement)
+        students = result.all()
+        await self._read_results_from_table(students, session, fields)
+        return students
+
+    async def get_all_students(self, session: AsyncSession, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None):
+            statement = paginate(select(Student).options(*column_options(Student, fields)), STUDENT_PAGE_KEYS, cursor, limit)
 
             result = await session.exec(statement)
 
             if result is None:
                 raise StudentNotFound()
-            return result.all() 
+            students = result.all()
+            await self._read_results_from_table(students, session, fields)
+            return students
         
     async def create_a_student(self, session: AsyncSession, student_data: StudentCreateModel = Body(...)):
         student_data_dict = student_data.model_dump()
 
-        random_code = str(uuid.uuid4())[:8]
-        student_data_dict["exam_id"] = random_code
-
-        exam_id_check = await UserService().get_student_by_exam_id(student_data_dict["exam_id"], session) 
-        
         centre_no_check = await ExamCentreService().get_exam_centre_by_exam_centre_no(student_data_dict["exam_centre_no"], session)
 
-        if centre_no_check is not None:            
-            if exam_id_check is None:
-                new_student = Student(
-                    **student_data_dict
-                )
-                session.add(new_student)
-                await session.commit()
+        if centre_no_check is not None:
+            student_data_dict["exam_id"] = (await exam_id_codes.allocate(session))[0]
+
+            new_student = Student(
+                **student_data_dict
+            )
+            session.add(new_student)
+            if new_student.result:
+                await session.flush()
+                await self._sync_result_rows([new_student.uid], session)
+            await session.commit()
+            analytics_refresher.schedule()
 
-                return new_student
+            return new_student
             
-            raise StudentAlreadyExists()
         raise CenterNoNotFound()
 
+    def _scan_registration_records(self, records: Iterator[Tuple[int, Optional[dict]]]):
+        valid = 0
+        centres = Counter()
+        errors = []
+        error_count = 0
+
+        for line_no, record in records:
+            problem = None
+            if record is None:
+                problem = "malformed record"
+            else:
+                try:
+                    student_data = StudentCreateModel.model_validate(record)
+                    centres[student_data.exam_centre_no] += 1
+                    valid += 1
+                except ValidationError as e:
+                    error = e.errors()[0]
+                    problem = f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+
+            if problem is not None:
+                error_count += 1
+                if len(errors) < settings.UPLOAD_MAX_REPORTED_ERRORS:
+                    errors.append({"line": line_no, "error": problem})
+
+        return valid, centres, errors, error_count
+
+    async def scan_registration_records(self, records: Iterator[Tuple[int, Optional[dict]]], session: AsyncSession) -> dict:
+        """
+        Validates a bulk registration file before anything is written.
+
+        Every record is checked against StudentCreateModel and all referenced
+        centre numbers are checked with one query.
+
+        Args:
+            records (Iterator[Tuple[int, Optional[dict]]]): (line number, record) pairs.
+            session (AsyncSession): An asynchronous database session.
+
+        Returns:
+            dict: The number of "valid" records, the "error_count" and the
+            first UPLOAD_MAX_REPORTED_ERRORS "errors", including unknown centres.
+        """
+        valid, centres, errors, error_count = await run_in_threadpool(self._scan_registration_records, records)
+
+        if centres:
+            statement = select(ExamCentre.exam_centre_no).where(
+                ExamCentre.exam_centre_no == any_(cast(list(centres), ARRAY(String)))
+            )
+            known = set((await session.exec(statement)).all())
+            for exam_centre_no in sorted(set(centres) - known):
+                error_count += centres[exam_centre_no]
+                valid -= centres[exam_centre_no]
+                errors.append({"exam_centre_no": exam_centre_no, "rows": centres[exam_centre_no], "error": "unknown exam centre"})
+
+        return {"valid": valid, "error_count": error_count, "errors": errors}
+
+    async def bulk_register_students(self, records: Iterator[Tuple[int, Optional[dict]]], session: AsyncSession) -> AsyncIterator[dict]:
+        """
+        Registers the students of an already scanned file in one transaction.
+
+        Records are read UPLOAD_CHUNK_SIZE at a time; each chunk gets its exam
+        IDs allocated as a batch and is written with COPY.
+
+        Args:
+            records (Iterator[Tuple[int, Optional[dict]]]): (line number, record) pairs.
+            session (AsyncSession): An asynchronous database session.
+
+        Yields:
+            dict: A "registered" event per chunk listing each line's new exam
+            ID, then a "complete" event once the transaction has committed.
+        """
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        registered = 0
+
+        while True:
+            chunk = await run_in_threadpool(next_chunk, records, settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            students = [(line_no, StudentCreateModel.model_validate(record)) for line_no, record in chunk]
+            exam_ids = await exam_id_codes.allocate(session, len(students))
+            uids = [uuid.uuid4() for _ in students]
+            now = datetime.now()
+
+            await raw_connection.driver_connection.copy_records_to_table(
+                "students",
+                records=[
+                    (
+                        uid, student_data.first_name, student_data.last_name, student_data.exam_centre_no,
+                        exam_id, False, student_data.exam_year,
+                        json.dumps(student_data.result) if student_data.result is not None else None,
+                        now, now
+                    )
+                    for (_, student_data), exam_id, uid in zip(students, exam_ids, uids)
+                ],
+                columns=[
+                    "uid", "first_name", "last_name", "exam_centre_no", "exam_id", "is_approved",
+                    "exam_year", "result", "created_at", "updated_at"
+                ]
+            )
+
+            with_results = [uid for (_, student_data), uid in zip(students, uids) if student_data.result]
+            if with_results:
+                await self._sync_result_rows(with_results, session)
+
+            registered += len(students)
+            yield {
+                "event": "registered",
+                "students": [{"line": line_no, "exam_id": exam_id} for (line_no, _), exam_id in zip(students, exam_ids)],
+            }
+
+        await session.commit()
+        analytics_refresher.schedule()
+        yield {"event": "complete", "registered": registered}
+
     async def update_a_student(self, student_uid: str, student_data: dict, session: AsyncSession):
         student_to_update = await self.get_a_student(student_uid, session)
 
         if student_to_update:
+            previous_exam_id = student_to_update.exam_id
             for k, v in student_data.items():
                 setattr(student_to_update, k, v)
 
+            if "result" in student_data:
+                await session.flush()
+                await self._sync_result_rows([student_to_update.uid], session)
             await session.commit()
+            analytics_refresher.schedule()
+            await result_cache.invalidate({previous_exam_id, student_to_update.exam_id})
 
             return student_to_update
         
@@ -235,6 +569,10 @@ class StudentService:
         """
         Updates the results of students for a given subject and exam center.
 
+        The whole upload runs as one transaction: exam IDs are resolved with a
+        single query and the grades are merged into the result JSONB with a
+        single set-based UPDATE.
+
         Args:
             exam_centre_no (str): The exam center number.
             subject_code (str): The subject code.
@@ -242,33 +580,74 @@ class StudentService:
             session (AsyncSession): An asynchronous database session.
             
         Returns:
-            str: "done" if the operation is successful.
+            dict: The exam IDs that were "applied", "unchanged" (already held
+            that grade) and "unknown" (no such student at this centre).
         """
             
         subject = await SubjectService().get_subject_by_code(subject_code, session)
+        if subject is None:
+            raise SubjectNotFound()
         subject_name = subject.subject_name
 
         exam_centre_check = await ExamCentreService().get_exam_centre_by_exam_centre_no(exam_centre_no, session)
         if exam_centre_check is None:
             raise CentreNotFound()
-        
-        for exam_id, grade in result_data.items():
-            student = await StudentService().get_a_student_by_exam_id(exam_id, session)
-            if student:
-                existing_result = student.result
-
-                new_result = {
-                    **existing_result,
-                    subject_name: grade
-                }
 
-                setattr(student, "result", new_result)
-                await session.commit()
+        exam_ids = [str(exam_id) for exam_id in result_data.keys()]
+        if not exam_ids:
+            return {"applied": [], "unchanged": [], "unknown": []}
 
-            else:
-                raise StudentNotFound()
-        
-        return "done"
+        statement = select(Student.exam_id).where(
+            Student.exam_centre_no == exam_centre_no,
+            Student.exam_id == any_(cast(exam_ids, ARRAY(String)))
+        )
+        known = set((await session.exec(statement)).all())
+
+        # unnest() rather than a VALUES list keeps this to three bind
+        # parameters, however many candidates the upload covers. The same
+        # statement upserts the changed grades into student_results, and
+        # deletes the rows of grades that were set to null.
+        statement = text("""
+            WITH updated AS (
+                UPDATE students AS s
+                SET result = COALESCE(s.result, '{}'::jsonb) || jsonb_build_object(CAST(:subject_name AS text), v.grade::jsonb),
+                    updated_at = :updated_at
+                FROM unnest(CAST(:exam_ids AS text[]), CAST(:grades AS text[])) AS v(exam_id, grade)
+                WHERE s.exam_id = v.exam_id
+                  AND s.exam_centre_no = :exam_centre_no
+                  AND s.result -> CAST(:subject_name AS text) IS DISTINCT FROM v.grade::jsonb
+                RETURNING s.uid, s.exam_id, v.grade::jsonb #>> '{}' AS grade
+            ), written AS (
+                INSERT INTO student_results (student_uid, subject_code, grade, updated_at)
+                SELECT uid, :subject_code, grade, :updated_at FROM updated WHERE grade IS NOT NULL
+                ON CONFLICT (student_uid, subject_code)
+                DO UPDATE SET grade = EXCLUDED.grade, updated_at = EXCLUDED.updated_at
+            ), cleared AS (
+                DELETE FROM student_results
+                WHERE subject_code = :subject_code
+                  AND student_uid IN (SELECT uid FROM updated WHERE grade IS NULL)
+            )
+            SELECT exam_id FROM updated
+        """)
+        result = await session.exec(statement, params={
+            "subject_name": subject_name,
+            "subject_code": subject.subject_code,
+            "updated_at": datetime.now(),
+            "exam_ids": exam_ids,
+            "grades": [json.dumps(grade) for grade in result_data.values()],
+            "exam_centre_no": exam_centre_no,
+        })
+        applied = set(result.scalars().all())
+        await session.commit()
+        if applied:
+            analytics_refresher.schedule()
+            await result_cache.invalidate(applied)
+
+        return {
+            "applied": sorted(applied),
+            "unchanged": sorted(known - applied),
+            "unknown": sorted(set(exam_ids) - known),
+        }
 
     async def delete_a_student(self, student_uid: str, session: AsyncSession):
         student_to_delete = await self.get_a_student(student_uid, session)
@@ -278,18 +657,21 @@ class StudentService:
         
         await session.delete(student_to_delete)
         await session.commit()
+        analytics_refresher.schedule()
+        await result_cache.invalidate([student_to_delete.exam_id])
       
 class ExamCentreService:
     async def get_exam_centre_by_exam_centre_no(self, exam_centre_no: str, session: AsyncSession):
-        statement = select(ExamCentre).where(ExamCentre.exam_centre_no == exam_centre_no)
-        result = await session.exec(statement)
+        return await centre_registry.get("exam_centre_no", exam_centre_no, session)
 
-        if result is None:
-            raise CentreNotFound()
-        return result.first() 
+    async def get_shared_exam_centre_by_no(self, exam_centre_no: str):
+        return await centre_registry.get("exam_centre_no", exam_centre_no)
+
+    async def get_shared_exam_centre_by_uid(self, exam_centre_uid: str):
+        return await centre_registry.get("uid", exam_centre_uid)
 
-    async def get_all_exam_centres(self, session: AsyncSession):
-        statement = select(ExamCentre).order_by(desc(ExamCentre.created_at))
+    async def get_all_exam_centres(self, session: AsyncSession, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None):
+        statement = paginate(select(ExamCentre).options(*column_options(ExamCentre, fields)), EXAM_CENTRE_PAGE_KEYS, cursor, limit)
         result = await session.exec(statement)
 
         if result is None:
@@ -310,18 +692,14 @@ class ExamCentreService:
     async def create_an_exam_centre(self, exam_centre_data: ExamCentreCreateModel, session: AsyncSession):
         exam_centre_data_dict = exam_centre_data.model_dump()
 
-        random_code = str(uuid.uuid4())[:6]
-        exam_centre_data_dict["exam_centre_no"] = random_code
-
-        exam_centre_no = exam_centre_data_dict["exam_centre_no"]
+        exam_centre_data_dict["exam_centre_no"] = (await exam_centre_codes.allocate(session))[0]
 
-        if await self.get_exam_centre_by_exam_centre_no(exam_centre_no, session):
-            raise CentreAlreadyExists()
-        
         new_centre = ExamCentre(**exam_centre_data_dict)
 
         session.add(new_centre)
+        await centre_registry.notify(session, str(new_centre.uid))
         await session.commit()
+        centre_registry.invalidate()
 
         return new_centre
 
@@ -330,7 +708,12 @@ class ExamCentreService:
         if exam_centre_to_update:
             for k, v in exam_centre_data.items():
                 setattr(exam_centre_to_update, k, v)
+            await centre_registry.notify(session, str(exam_centre_to_update.uid))
             await session.commit()
+            centre_registry.invalidate()
+            analytics_refresher.schedule()
+            # Cached student documents embed their centre.
+            await result_cache.clear()
             return exam_centre_to_update
         raise CentreNotFound()
 
@@ -338,7 +721,10 @@ class ExamCentreService:
         exam_centre_to_delete = await self.get_exam_centre_by_exam_centre_uid(exam_centre_uid, session)
         if exam_centre_to_delete:
             await session.delete(exam_centre_to_delete)
+            await centre_registry.notify(session, str(exam_centre_to_delete.uid))
             await session.commit()
+            centre_registry.invalidate()
+            await result_cache.clear()
         else:
             raise CentreNotFound()
         
@@ -367,15 +753,15 @@ class AdminService:
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error is {e}")
 
-    async def get_all_admins(self, session: AsyncSession):
-        statement = select(Admin).order_by(desc(Admin.created_at))
+    async def get_all_admins(self, session: AsyncSession, limit: Optional[int] = None, cursor: Optional[str] = None):
+        statement = paginate(select(Admin), ADMIN_PAGE_KEYS, cursor, limit)
         result = await session.exec(statement)
         return result.all() if result else None
 
     async def create_super_admin(self, background_tasks: BackgroundTasks, session: AsyncSession):
         admin_data = {
             "email": settings.SUPER_ADMIN_EMAIL,
-            "password": generate_passwd_hash(settings.SUPER_ADMIN_PASSWORD),
+            "password": await password_hasher.hash(settings.SUPER_ADMIN_PASSWORD),
             "first_name": settings.SUPER_ADMIN_FIRSTNAME,
             "last_name": settings.SUPER_ADMIN_LASTNAME,
             "phone_number": settings.SUPER_ADMIN_PHONE_NUMBER,
@@ -420,7 +806,7 @@ class AdminService:
         admin_data_dict["password"] = random_code
 
         new_admin = Admin(**admin_data_dict)
-        new_admin.password = generate_passwd_hash(new_admin.password)
+        new_admin.password = await password_hasher.hash(new_admin.password)
 
         html = f"""<body>
             <h1>Welcome to Resultify</h1></br>
@@ -466,10 +852,10 @@ class AdminService:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error is {e}")
 
 class SubjectService:
-    async def get_all_subjects(self, session: AsyncSession):
-        statement = select(Subject).order_by(Subject.subject_name)
-        result = await session.exec(statement)
-        return result.all() if result else None
+    async def get_all_subjects(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Subject], bytes]:
+        """Returns a page of subjects from the catalogue together with its serialised JSON."""
+        after = decode_cursor(cursor, SUBJECT_PAGE_KEYS) if cursor is not None else None
+        return (await subject_catalogue.get()).page(limit, after)
     
     async def get_subject_by_uid(self, uid: str, session: AsyncSession):
         statement = select(Subject).where(Subject.uid == uid)
@@ -479,53 +865,49 @@ class SubjectService:
             raise SubjectNotFound()
         return result.first()
     
-    async def get_subject_by_code(self, code: str, session: AsyncSession):
-        statement = select(Subject).where(Subject.subject_code == code)
-        result = await session.exec(statement)
-
-        if result is None:
-            raise SubjectNotFound()
-        return result.first()
-    
-    async def get_subject_by_name(self, name: str, session: AsyncSession):
-        statement = select(Subject).where(Subject.subject_name == name)
-        result = await session.exec(statement)
-
-        if result is None:
-            raise SubjectNotFound()
-        return result.first()
+    async def get_subject_by_code(self, code: str, session: Optional[AsyncSession] = None) -> Optional[Subject]:
+        subject = (await subject_catalogue.get(session)).by_code.get(code)
+        if subject is None:
+            # The subject may have been created by another worker since the last check.
+            subject = (await subject_catalogue.get(session, check=True)).by_code.get(code)
+        return subject
+
+    async def get_subject_by_name(self, name: str, session: Optional[AsyncSession] = None) -> Optional[Subject]:
+        subject = (await subject_catalogue.get(session)).by_name.get(name)
+        if subject is None:
+            subject = (await subject_catalogue.get(session, check=True)).by_name.get(name)
+        return subject
     
     async def create_a_subject(self, subject_data: SubjectCreateModel, session: AsyncSession):
         subject_data_dict = subject_data.model_dump()
 
-        random_code = str(uuid.uuid4())[:6]
-        subject_data_dict["subject_code"] = random_code
-
-        subject_code = subject_data_dict["subject_code"]
         subject_name = subject_data_dict["subject_name"]
 
         if not subject_name:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Subject name is required")
 
-        if await self.get_subject_by_code(subject_code, session):
-            raise SubjectAlreadyExists()
-        
         if await self.get_subject_by_name(subject_name, session):
             raise SubjectAlreadyExists()
         
+        subject_data_dict["subject_code"] = (await subject_codes.allocate(session))[0]
+
         new_subject = Subject(**subject_data_dict)
 
         session.add(new_subject)
+        await subject_catalogue.bump(session)
         await session.commit()
+        subject_catalogue.invalidate()
 
         return new_subject
     
     async def update_a_subject(self, subject_uid: str, subject_data: SubjectCreateModel, session: AsyncSession):
         subject_to_update = await self.get_subject_by_uid(subject_uid, session)
         if subject_to_update:
-            for k, v in subject_data.items():
+            for k, v in subject_data.model_dump().items():
                 setattr(subject_to_update, k, v)
+            await subject_catalogue.bump(session)
             await session.commit()
+            subject_catalogue.invalidate()
             return subject_to_update
         raise SubjectNotFound()
     
@@ -533,6 +915,559 @@ class SubjectService:
         subject_to_delete = await self.get_subject_by_uid(subject_uid, session)
         if subject_to_delete:
             await session.delete(subject_to_delete)
+            await subject_catalogue.bump(session)
             await session.commit()
+            subject_catalogue.invalidate()
         else:
-            raise SubjectNotFound()
\ No newline at end of file
+            raise SubjectNotFound()
+
+class StatsService:
+    async def get_dashboard_stats(self, session: AsyncSession) -> dict:
+        """
+        Computes every admin dashboard count in the database in one round trip.
+
+        Results are cached for DASHBOARD_STATS_CACHE_TTL seconds so frequent
+        dashboard polling does not rescan the tables.
+
+        Args:
+            session (AsyncSession): An asynchronous database session.
+
+        Returns:
+            dict: User, paid user, centre, student and approved student totals,
+            plus student counts keyed by exam centre number and by exam year.
+        """
+        cached = dashboard_stats_cache.get("dashboard")
+        if cached is not None:
+            return cached
+
+        def count(model, *criteria):
+            return select(func.count()).select_from(model).where(*criteria).scalar_subquery()
+
+        def count_by(column):
+            grouped = select(column.label("key"), func.count().label("total")).group_by(column).subquery()
+            return select(func.json_object_agg(grouped.c.key, grouped.c.total, type_=JSON)).scalar_subquery()
+
+        statement = select(
+            count(User).label("users"),
+            count(User, User.is_paid.is_(True)).label("paid_users"),
+            count(ExamCentre).label("centres"),
+            count(Student).label("students"),
+            count(Student, Student.is_approved.is_(True)).label("approved_students"),
+            count_by(Student.exam_centre_no).label("students_per_centre"),
+            count_by(Student.exam_year).label("students_per_exam_year"),
+        )
+
+        result = await session.exec(statement)
+        row = result.one()._asdict()
+
+        stats = {
+            **row,
+            "students_per_centre": row["students_per_centre"] or {},
+            "students_per_exam_year": row["students_per_exam_year"] or {},
+        }
+        dashboard_stats_cache.set("dashboard", stats)
+        return stats
+
+    def _rate(self, part: int, whole: int) -> Optional[float]:
+        return round(part / whole, 4) if whole else None
+
+    def _view_filters(self, view, exam_centre_no: Optional[str], exam_year: Optional[int], subject_code: Optional[str] = None) -> list:
+        criteria = []
+        if exam_centre_no:
+            criteria.append(view.c.exam_centre_no == exam_centre_no)
+        if exam_year is not None:
+            criteria.append(view.c.exam_year == exam_year)
+        if subject_code:
+            criteria.append(view.c.subject_code == subject_code)
+        return criteria
+
+    async def get_grade_distribution(self, session: AsyncSession, exam_centre_no: Optional[str] = None, exam_year: Optional[int] = None, subject_code: Optional[str] = None) -> List[dict]:
+        """
+        Returns the grade histogram of every (centre, exam year, subject) group.
+
+        Reads the grade_distribution materialised view, so the figures are
+        as of its last refresh rather than live.
+
+        Args:
+            session (AsyncSession): An asynchronous database session.
+            exam_centre_no (Optional[str]): Only include this centre.
+            exam_year (Optional[int]): Only include this exam year.
+            subject_code (Optional[str]): Only include this subject.
+
+        Returns:
+            List[dict]: One entry per group with its "grades" histogram,
+            "candidates", "passed" (a grade in PASS_GRADES) and "pass_rate".
+        """
+        statement = (
+            select(grade_distribution)
+            .where(*self._view_filters(grade_distribution, exam_centre_no, exam_year, subject_code))
+            .order_by(grade_distribution.c.exam_centre_no, grade_distribution.c.exam_year, grade_distribution.c.subject_code, grade_distribution.c.grade)
+        )
+        result = await session.exec(statement)
+
+        pass_grades = set(settings.PASS_GRADES)
+        groups = {}
+        for row in result.all():
+            key = (row.exam_centre_no, row.exam_year, row.subject_code)
+            group = groups.setdefault(key, {
+                "exam_centre_no": row.exam_centre_no,
+                "exam_year": row.exam_year,
+                "subject_code": row.subject_code,
+                "subject_name": row.subject_name,
+                "grades": {},
+                "candidates": 0,
+                "passed": 0,
+            })
+            group["grades"][row.grade] = row.candidates
+            group["candidates"] += row.candidates
+            if row.grade in pass_grades:
+                group["passed"] += row.candidates
+
+        for group in groups.values():
+            group["pass_rate"] = self._rate(group["passed"], group["candidates"])
+        return list(groups.values())
+
+    async def get_pass_rates(self, by: str, session: AsyncSession, exam_centre_no: Optional[str] = None, exam_year: Optional[int] = None, subject_code: Optional[str] = None) -> List[dict]:
+        """Totals graded and passed candidates per `by` column ("exam_centre_no", "exam_year" or "subject_code")."""
+        group_by = grade_distribution.c[by]
+        statement = (
+            select(
+                group_by,
+                func.sum(grade_distribution.c.candidates).label("candidates"),
+                func.coalesce(
+                    func.sum(grade_distribution.c.candidates).filter(grade_distribution.c.grade.in_(settings.PASS_GRADES)), 0
+                ).label("passed"),
+            )
+            .where(*self._view_filters(grade_distribution, exam_centre_no, exam_year, subject_code))
+            .group_by(group_by)
+            .order_by(group_by)
+        )
+        result = await session.exec(statement)
+
+        return [
+            {by: row[0], "candidates": int(row.candidates), "passed": int(row.passed), "pass_rate": self._rate(row.passed, row.candidates)}
+            for row in result.all()
+        ]
+
+    async def get_approval_rates(self, by: str, session: AsyncSession, exam_centre_no: Optional[str] = None, exam_year: Optional[int] = None) -> List[dict]:
+        """Totals candidates, approved candidates and candidates with results per `by` column ("exam_centre_no" or "exam_year")."""
+        columns = [centre_approvals.c[by]]
+        if by == "exam_centre_no":
+            columns.append(centre_approvals.c.exam_centre_name)
+
+        statement = (
+            select(
+                *columns,
+                func.sum(centre_approvals.c.candidates).label("candidates"),
+                func.sum(centre_approvals.c.approved).label("approved"),
+                func.sum(centre_approvals.c.with_results).label("with_results"),
+            )
+            .where(*self._view_filters(centre_approvals, exam_centre_no, exam_year))
+            .group_by(*columns)
+            .order_by(*columns)
+        )
+        result = await session.exec(statement)
+
+        rates = []
+        for row in result.all():
+            entry = {column.key: row._mapping[column.key] for column in columns}
+            entry.update(
+                candidates=int(row.candidates),
+                approved=int(row.approved),
+                with_results=int(row.with_results),
+                approval_rate=self._rate(row.approved, row.candidates),
+            )
+            rates.append(entry)
+        return rates
+
+class ResultSheetService:
+    MAX_GRADE_LENGTH = 16
+
+    async def resolve_sheet_subjects(self, header: List[str], session: AsyncSession) -> List[str]:
+        """Validates a result sheet header and returns the subject name of each grade column."""
+        if len(header) < 2 or header[0].lower() != "exam_id" or is_undecodable(header):
+            raise InvalidSheetHeader()
+
+        codes = header[1:]
+        if len(set(codes)) != len(codes) or "" in codes:
+            raise InvalidSheetHeader()
+
+        by_code = (await subject_catalogue.get(session)).by_code
+        if any(code not in by_code for code in codes):
+            by_code = (await subject_catalogue.get(session, check=True)).by_code
+            if any(code not in by_code for code in codes):
+                raise SubjectNotFound()
+
+        return [by_code[code].subject_name for code in codes]
+
+    def _validate_rows(self, chunk: List[List[str]], first_line_no: int, subject_names: List[str], errors: List[dict]) -> List[tuple]:
+        records = []
+        for line_no, row in enumerate(chunk, start=first_line_no):
+            if not any(row):
+                continue
+
+            exam_id, grades = row[0], row[1:]
+            if is_undecodable(row):
+                errors.append({"line": line_no, "exam_id": None, "error": "not valid UTF-8"})
+                continue
+            if not exam_id:
+                errors.append({"line": line_no, "exam_id": None, "error": "missing exam_id"})
+                continue
+            if len(grades) > len(subject_names):
+                errors.append({"line": line_no, "exam_id": exam_id, "error": "more cells than header columns"})
+                continue
+
+            for subject_name, grade in zip(subject_names, grades):
+                if not grade:
+                    continue
+                if len(grade) > self.MAX_GRADE_LENGTH:
+                    errors.append({"line": line_no, "exam_id": exam_id, "error": f"grade for {subject_name} is too long"})
+                    continue
+                records.append((line_no, exam_id, subject_name, grade))
+        return records
+
+    async def ingest_result_sheet(self, rows: Iterator[List[str]], subject_names: List[str], exam_centre_no: Optional[str], session: AsyncSession) -> AsyncIterator[dict]:
+        """
+        Loads the grade rows of a result sheet into students.result.
+
+        Rows are read UPLOAD_CHUNK_SIZE at a time and COPYed into a staging
+        table, so memory stays bounded whatever the size of the sheet. The
+        staged grades are merged into the result JSONB, and upserted into
+        student_results, by a single statement and the whole upload commits or
+        rolls back as one transaction.
+
+        Args:
+            rows (Iterator[List[str]]): The sheet rows following the header.
+            subject_names (List[str]): The subject name of each grade column.
+            exam_centre_no (Optional[str]): When given, only students of this centre are updated.
+            session (AsyncSession): An asynchronous database session.
+
+        Yields:
+            dict: A "progress" event per chunk carrying that chunk's row
+            errors, then a "complete" event summarising the merge.
+        """
+        await session.exec(text("""
+            CREATE TEMP TABLE result_staging (
+                line_no integer NOT NULL,
+                exam_id text NOT NULL,
+                subject_name text NOT NULL,
+                grade text NOT NULL
+            ) ON COMMIT DROP
+        """))
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+
+        rows_read = 0
+        grades_staged = 0
+        error_count = 0
+
+        while True:
+            chunk = await run_in_threadpool(next_chunk, rows, settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            errors = []
+            records = self._validate_rows(chunk, rows_read + 2, subject_names, errors)
+            if records:
+                await raw_connection.driver_connection.copy_records_to_table(
+                    "result_staging",
+                    records=records,
+                    columns=["line_no", "exam_id", "subject_name", "grade"]
+                )
+
+            rows_read += len(chunk)
+            grades_staged += len(records)
+            error_count += len(errors)
+            reported = max(settings.UPLOAD_MAX_REPORTED_ERRORS - (error_count - len(errors)), 0)
+
+            yield {
+                "event": "progress",
+                "rows_read": rows_read,
+                "grades_staged": grades_staged,
+                "errors": errors[:reported],
+            }
+
+        # Autovacuum never analyzes temporary tables. Without statistics the
+        # planner assumes a couple of hundred candidates whatever the sheet
+        # holds, and may scan every student to merge a handful of rows.
+        await session.exec(text("ANALYZE result_staging"))
+
+        centre_filter = "AND s.exam_centre_no = :exam_centre_no" if exam_centre_no else ""
+        params = {"exam_centre_no": exam_centre_no} if exam_centre_no else {}
+
+        result = await session.exec(text(f"""
+            WITH merged AS (
+                SELECT exam_id, jsonb_object_agg(subject_name, to_jsonb(grade) ORDER BY line_no) AS grades
+                FROM result_staging
+                GROUP BY exam_id
+            ), updated AS (
+                UPDATE students AS s
+                SET result = COALESCE(s.result, '{{}}'::jsonb) || m.grades,
+                    updated_at = :updated_at
+                FROM merged AS m
+                WHERE s.exam_id = m.exam_id
+                  {centre_filter}
+                  AND NOT COALESCE(s.result, '{{}}'::jsonb) @> m.grades
+                RETURNING s.uid, s.exam_id, m.grades
+            ), written AS (
+                INSERT INTO student_results (student_uid, subject_code, grade, updated_at)
+                SELECT u.uid, sub.subject_code, g.value, :updated_at
+                FROM updated AS u
+                CROSS JOIN LATERAL jsonb_each_text(u.grades) AS g
+                JOIN subjects AS sub ON sub.subject_name = g.key
+                ON CONFLICT (student_uid, subject_code)
+                DO UPDATE SET grade = EXCLUDED.grade, updated_at = EXCLUDED.updated_at
+            )
+            SELECT exam_id FROM updated
+        """), params={**params, "updated_at": datetime.now()})
+        applied_exam_ids = result.scalars().all()
+        applied = len(applied_exam_ids)
+
+        result = await session.exec(text(f"""
+            SELECT exam_id, count(*) OVER () AS total
+            FROM (
+                SELECT DISTINCT r.exam_id
+                FROM result_staging AS r
+                LEFT JOIN students AS s ON s.exam_id = r.exam_id {centre_filter}
+                WHERE s.uid IS NULL
+            ) AS unknown
+            ORDER BY exam_id
+            LIMIT :limit
+        """), params={**params, "limit": settings.UPLOAD_MAX_REPORTED_ERRORS})
+        unknown = result.all()
+        unknown_count = unknown[0].total if unknown else 0
+
+        result = await session.exec(text("SELECT count(DISTINCT exam_id) FROM result_staging"))
+        candidates = result.scalar_one()
+
+        await session.commit()
+        if applied:
+            analytics_refresher.schedule()
+            await result_cache.invalidate(applied_exam_ids)
+
+        yield {
+            "event": "complete",
+            "rows_read": rows_read,
+            "grades_staged": grades_staged,
+            "error_count": error_count,
+            "applied": applied,
+            "unchanged": candidates - applied - unknown_count,
+            "unknown": unknown_count,
+            "unknown_exam_ids": [row.exam_id for row in unknown],
+        }
+
+
+class ResultExportService:
+    STUDENT_COLUMNS = ("exam_id", "first_name", "last_name", "exam_centre_no", "exam_year", "is_approved")
+
+    async def resolve_export_subjects(self, subject_code: Optional[str], session: AsyncSession) -> List[Subject]:
+        """Returns the subjects that get a grade column: the one asked for, or all of them."""
+        if subject_code:
+            subject = await SubjectService().get_subject_by_code(subject_code, session)
+            if subject is None:
+                raise SubjectNotFound()
+            return [subject]
+
+        by_code = (await subject_catalogue.get(session)).by_code
+        return [by_code[code] for code in sorted(by_code)]
+
+    def _export_statement(self, subjects: List[Subject], exam_centre_no: Optional[str], exam_year: Optional[int], subject_code: Optional[str]):
+        grades = [Student.result[subject.subject_name].astext.label(subject.subject_code) for subject in subjects]
+        statement = select(*(getattr(Student, name) for name in self.STUDENT_COLUMNS), *grades).order_by(Student.exam_id)
+
+        if exam_centre_no:
+            statement = statement.where(Student.exam_centre_no == exam_centre_no)
+        if exam_year is not None:
+            statement = statement.where(Student.exam_year == exam_year)
+        if subject_code:
+            statement = statement.where(Student.result.has_key(subjects[0].subject_name))
+        return statement
+
+    async def export_results(self, fmt: str, subjects: List[Subject], session: AsyncSession, exam_centre_no: Optional[str] = None, exam_year: Optional[int] = None, subject_code: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Streams students and their grades as CSV or NDJSON text.
+
+        The rows come from a server-side cursor EXPORT_BATCH_SIZE at a time
+        and each batch is encoded and yielded before the next is fetched, so
+        memory stays flat however many students match. Grades are pulled out
+        of the result JSONB in SQL, one column per subject, headed by its
+        subject code.
+
+        Args:
+            fmt (str): "csv" or "ndjson".
+            subjects (List[Subject]): The subjects to export, from resolve_export_subjects.
+            session (AsyncSession): A session the stream can hold until it is exhausted.
+            exam_centre_no (Optional[str]): Only export students of this centre.
+            exam_year (Optional[int]): Only export students sitting this year.
+            subject_code (Optional[str]): Only export students with a grade in this subject.
+
+        Yields:
+            str: The encoded rows of one batch, with the CSV header first.
+        """
+        statement = self._export_statement(subjects, exam_centre_no, exam_year, subject_code)
+        header = [*self.STUDENT_COLUMNS, *(subject.subject_code for subject in subjects)]
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(header)
+            yield buffer.getvalue()
+
+        result = await session.stream(statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            if fmt == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(dict(zip(header, row))) + "\n" for row in rows)
+
+class RankingService:
+    async def load_result_matrix(self, exam_year: int, session: AsyncSession) -> dict:
+        """
+        Reads an exam year's grades into a candidates x subjects matrix of grade codes.
+
+        Grades are looked up in GRADE_POINTS by Postgres, so only small ints
+        cross the wire; grades outside the scale count as no grade. Rows are
+        fetched through a server-side cursor EXPORT_BATCH_SIZE at a time.
+
+        Args:
+            exam_year (int): The exam year to load.
+            session (AsyncSession): An asynchronous database session.
+
+        Returns:
+            dict: "uids" and "centre_nos" lists, the "centres" index array
+            into "centre_numbers", the "subjects" in column order and the
+            int8 "grades" matrix.
+        """
+        by_code = (await subject_catalogue.get(session, check=True)).by_code
+        subjects = [by_code[code] for code in sorted(by_code)]
+        scale = cast(list(settings.GRADE_POINTS), ARRAY(String))
+        grade_codes = [
+            func.coalesce(func.array_position(scale, Student.result[subject.subject_name].astext), 0)
+            for subject in subjects
+        ]
+        statement = (
+            select(Student.uid, Student.exam_centre_no, *grade_codes)
+            .where(Student.exam_year == exam_year)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+
+        uids, centre_nos, blocks = [], [], []
+        result = await session.stream(statement)
+        async for rows in result.partitions():
+            uids.extend(row[0] for row in rows)
+            centre_nos.extend(row[1] for row in rows)
+            blocks.append(np.array([row[2:] for row in rows], dtype=np.int8).reshape(len(rows), len(subjects)))
+
+        centre_numbers, centres = np.unique(np.array(centre_nos, dtype=object), return_inverse=True)
+        return {
+            "uids": uids,
+            "centre_nos": centre_nos,
+            "centre_numbers": centre_numbers,
+            "centres": centres,
+            "subjects": subjects,
+            "grades": np.concatenate(blocks) if blocks else np.zeros((0, len(subjects)), dtype=np.int8),
+        }
+
+    async def rank_exam_year(self, exam_year: int, session: AsyncSession) -> dict:
+        """
+        Recomputes the aggregates and rankings of every candidate in an exam year.
+
+        The matrix is ranked in a worker thread, then the year's rows in
+        result_aggregates and subject_rankings are replaced with COPY in one
+        transaction, so readers see either the old figures or the new ones.
+
+        Args:
+            exam_year (int): The exam year to rank.
+            session (AsyncSession): An asynchronous database session.
+
+        Returns:
+            dict: The number of candidates, subjects and overall passes, and the time taken.
+        """
+        started_at = time.perf_counter()
+        matrix = await self.load_result_matrix(exam_year, session)
+        subjects = matrix["subjects"]
+
+        points_table, pass_table = grade_lookup_tables(settings.GRADE_POINTS, settings.PASS_GRADES)
+        required = [i for i, subject in enumerate(subjects) if subject.subject_code in settings.RANKING_REQUIRED_SUBJECTS]
+        aggregates = await run_in_threadpool(
+            compute_aggregates, matrix["grades"], matrix["centres"], len(matrix["centre_numbers"]),
+            points_table, pass_table, settings.RANKING_MIN_PASSES, required
+        )
+
+        await session.exec(text("DELETE FROM subject_rankings WHERE exam_year = :exam_year"), params={"exam_year": exam_year})
+        await session.exec(text("DELETE FROM result_aggregates WHERE exam_year = :exam_year"), params={"exam_year": exam_year})
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        now = datetime.now()
+
+        uids = matrix["uids"]
+        average_points = [None if np.isnan(value) else round(value, 2) for value in aggregates["average_points"].tolist()]
+        national_rank = aggregates["national_rank"].tolist()
+        centre_rank = aggregates["centre_rank"].tolist()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "result_aggregates",
+            records=zip(
+                uids, repeat(exam_year), matrix["centre_nos"],
+                aggregates["subjects_taken"].tolist(), aggregates["subjects_passed"].tolist(),
+                aggregates["total_points"].tolist(), average_points, aggregates["passed"].tolist(),
+                (rank or None for rank in national_rank), (rank or None for rank in centre_rank), repeat(now)
+            ),
+            columns=[
+                "student_uid", "exam_year", "exam_centre_no", "subjects_taken", "subjects_passed",
+                "total_points", "average_points", "passed", "national_rank", "centre_rank", "computed_at"
+            ]
+        )
+
+        rows, columns = np.nonzero(aggregates["graded"])
+        scale = list(settings.GRADE_POINTS)
+        subject_codes = [subject.subject_code for subject in subjects]
+        await raw_connection.driver_connection.copy_records_to_table(
+            "subject_rankings",
+            records=zip(
+                (uids[row] for row in rows.tolist()), (subject_codes[column] for column in columns.tolist()), repeat(exam_year),
+                (scale[code - 1] for code in matrix["grades"][rows, columns].tolist()),
+                aggregates["points"][rows, columns].tolist(),
+                aggregates["subject_national_rank"][rows, columns].tolist(),
+                aggregates["subject_centre_rank"][rows, columns].tolist()
+            ),
+            columns=["student_uid", "subject_code", "exam_year", "grade", "points", "national_rank", "centre_rank"]
+        )
+
+        await session.commit()
+
+        return {
+            "exam_year": exam_year,
+            "candidates": len(uids),
+            "subjects": len(subjects),
+            "passed": int(aggregates["passed"].sum()),
+            "seconds": round(time.perf_counter() - started_at, 3),
+        }
+
+    async def get_candidate_aggregate(self, exam_id: str, session: AsyncSession) -> dict:
+        student = await StudentService().get_a_student_by_exam_id(exam_id, session)
+        if student is None:
+            raise StudentNotFound()
+
+        aggregate = await session.get(ResultAggregate, (student.exam_year, student.uid))
+        if aggregate is None:
+            raise ResultsNotRanked()
+
+        statement = (
+            select(SubjectRanking, Subject.subject_name)
+            .join(Subject, Subject.subject_code == SubjectRanking.subject_code)
+            .where(SubjectRanking.exam_year == aggregate.exam_year, SubjectRanking.student_uid == student.uid)
+            .order_by(SubjectRanking.subject_code)
+        )
+        result = await session.exec(statement)
+
+        return {
+            "exam_id": student.exam_id,
+            **aggregate.model_dump(exclude={"student_uid"}),
+            "subjects": [
+                {"subject_name": subject_name, **ranking.model_dump(exclude={"student_uid", "exam_year"})}
+                for ranking, subject_name in result.all()
+            ],
+        }
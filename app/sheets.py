@@ -0,0 +1,85 @@
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+import codecs
+import csv
+import json
+from .errors import UnsupportedSheet
+
+# CSV and NDJSON are decoded with errors="replace": bytes that are not UTF-8
+# become this character, and callers reject the rows that contain it rather
+# than the whole upload failing halfway through.
+UNDECODABLE = "\ufffd"
+
+def is_undecodable(cells: List[str]) -> bool:
+    return any(UNDECODABLE in cell for cell in cells)
+
+
+def iter_sheet_rows(file: BinaryIO, filename: str) -> Iterator[List[str]]:
+    """Yields the rows of a CSV or XLSX sheet one at a time, as lists of stripped strings.
+
+    Neither format is read into memory as a whole: CSV is decoded
+    incrementally and XLSX is opened in openpyxl's read-only streaming mode.
+    CSV rows that were not valid UTF-8 carry UNDECODABLE.
+    """
+    name = (filename or "").lower()
+
+    if name.endswith(".xlsx"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise UnsupportedSheet()
+
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield ["" if cell is None else str(cell).strip() for cell in row]
+        finally:
+            workbook.close()
+
+    elif name.endswith(".csv"):
+        reader = csv.reader(codecs.iterdecode(file, "utf-8-sig", errors="replace"))
+        for row in reader:
+            yield [cell.strip() for cell in row]
+
+    else:
+        raise UnsupportedSheet()
+
+
+def iter_records(file: BinaryIO, filename: str) -> Iterator[Tuple[int, Optional[dict]]]:
+    """Yields (line number, record) pairs from an NDJSON file or a sheet with a header row.
+
+    Blank lines are skipped, and a line that is not valid UTF-8 or not a
+    JSON object yields None as its record so the caller can report it. Empty
+    sheet cells are dropped.
+    """
+    name = (filename or "").lower()
+
+    if name.endswith((".ndjson", ".jsonl")):
+        for line_no, line in enumerate(codecs.iterdecode(file, "utf-8-sig", errors="replace"), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = None if UNDECODABLE in line else json.loads(line)
+            except ValueError:
+                record = None
+            yield line_no, record if isinstance(record, dict) else None
+
+    else:
+        rows = iter_sheet_rows(file, filename)
+        header = next(rows, [])
+        for line_no, row in enumerate(rows, start=2):
+            if not any(row):
+                continue
+            if is_undecodable(row):
+                yield line_no, None
+                continue
+            yield line_no, {key: value for key, value in zip(header, row) if value != ""}
+
+
+def next_chunk(rows: Iterator, size: int) -> list:
+    """Takes up to `size` rows from `rows`; an empty list means the sheet is exhausted."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            break
+    return chunk
@@ -0,0 +1,63 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+from .config import settings
+from .errors import LookupTimeout
+
+
+class SingleFlight:
+    """Coalesces concurrent identical reads into one in-flight call.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs await the same task instead of starting their own. Each
+    caller awaits it through asyncio.shield, so a disconnecting client
+    cancels only its own wait and never the shared call. The call itself is
+    bounded by `timeout`, after which every waiter gets LookupTimeout and the
+    key is free again.
+
+    The shared call outlives any one request, so it must not use a session
+    belonging to one.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            if not isinstance(task.exception(), asyncio.TimeoutError):
+                self.failures += 1
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.get_running_loop().create_task(asyncio.wait_for(func(), timeout or self.timeout))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise LookupTimeout()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+
+read_flight = SingleFlight(timeout=settings.SINGLE_FLIGHT_TIMEOUT)
@@ -2,6 +2,8 @@ from passlib.context import CryptContext
 from datetime import timedelta, datetime
 import jwt
 from .config import settings
+from .cache import TTLCache
+import hashlib
 import uuid
 import logging
 from itsdangerous import URLSafeTimedSerializer
@@ -12,6 +14,13 @@ passwd_context = CryptContext(
 
 ACCESS_TOKEN_EXPIRE = 3600
 
+# Tokens that already passed signature verification, keyed by their sha256
+# digest. Entries never outlive the token's own exp claim.
+verified_token_cache = TTLCache(
+    maxsize=settings.VERIFIED_TOKEN_CACHE_SIZE,
+    ttl=settings.VERIFIED_TOKEN_CACHE_TTL
+)
+
 def generate_passwd_hash(password:str) -> str:
     return passwd_context.hash(password)
 
@@ -35,6 +44,11 @@ def create_access_token(user_data:dict, expiry:timedelta = None, refresh:bool =
     return token
 
 def decode_token(token:str):
+    token_digest = hashlib.sha256(token.encode()).digest()
+
+    token_data = verified_token_cache.get(token_digest)
+    if token_data is not None:
+        return token_data
 
     try:
         token_data = jwt.decode(
@@ -42,11 +56,12 @@ def decode_token(token:str):
             algorithms=settings.ALGORITHM,
             key=settings.SECRET_KEY,
         )
-
-        return token_data
     except Exception as e:
         return None
 
+    verified_token_cache.set(token_digest, token_data, expires_at=token_data.get('exp'))
+    return token_data
+
 def create_safe_url(user_uid: str, email: str) -> str:
     signage = {
         'user_uid': user_uid,
@@ -0,0 +1,141 @@
+"""Benchmarks how many rows the centre reads load, before and after the students relationship stopped being eager.
+
+Run from the repository root against a migrated database:
+
+    python -m benchmarks.centre_loading [--centres 1000] [--students 500]
+
+The centres and their students are COPYed in inside one transaction. Every
+case reads through that same transaction, and it is rolled back at the end,
+so nothing is left behind. "before" reads with the old mapping, where
+ExamCentre.students and Student.exam_centre were both selectin-loaded.
+"after" reads through the current service methods.
+"""
+from sqlalchemy.orm import selectinload
+from sqlmodel import select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import sys
+import tracemalloc
+import uuid
+from app.config import settings
+from app.models import ExamCentre, Student
+from app.service import ExamCentreService, StudentService
+from app.db.main import async_session_maker, engine
+
+SUBJECTS = ("Mathematics", "English", "Physics", "Chemistry", "Biology", "Economics", "Geography", "Civic Education", "Literature")
+
+
+async def seed(session: AsyncSession, centres: int, students_per_centre: int) -> ExamCentre:
+    """COPYs the synthetic centres and students in and returns one of the centres."""
+    # The driver only sends BEGIN with the first statement, and COPY bypasses
+    # it, so one is run first to keep the seed inside the transaction.
+    await session.exec(text("SELECT 1"))
+    connection = await session.connection()
+    raw_connection = (await connection.get_raw_connection()).driver_connection
+    now = datetime.now()
+
+    centre_rows = [
+        (uuid.uuid4(), f"zb{i:04d}", f"Benchmark Centre {i}", "Lagos", "Admin", f"bench{i}@example.com", "0800000000", now, now)
+        for i in range(centres)
+    ]
+    await raw_connection.copy_records_to_table(
+        "exam_centres",
+        records=centre_rows,
+        columns=[
+            "uid", "exam_centre_no", "exam_centre_name", "exam_centre_location", "exam_centre_admin",
+            "exam_centre_admin_email", "exam_centre_admin_phone", "created_at", "updated_at"
+        ]
+    )
+
+    result = json.dumps({subject: "B" for subject in SUBJECTS})
+    for c, centre in enumerate(centre_rows):
+        await raw_connection.copy_records_to_table(
+            "students",
+            records=[
+                (uuid.uuid4(), f"First{s}", f"Last{s}", centre[1], f"z{c * students_per_centre + s:07d}", True, 2025, result, now, now)
+                for s in range(students_per_centre)
+            ],
+            columns=[
+                "uid", "first_name", "last_name", "exam_centre_no", "exam_id", "is_approved",
+                "exam_year", "result", "created_at", "updated_at"
+            ]
+        )
+
+    # Otherwise the planner still believes the tables are as small as before the seed.
+    await session.exec(text("ANALYZE exam_centres, students"))
+    return (await session.exec(select(ExamCentre).where(ExamCentre.uid == centre_rows[0][0]))).one()
+
+
+async def measure(session: AsyncSession, read) -> dict:
+    """Runs `read` on an empty identity map and reports the rows it loaded and its peak memory."""
+    session.expunge_all()
+    tracemalloc.start()
+    # The identity map holds rows weakly, so the result is kept alive until they are counted.
+    loaded = await read()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rows = len(session.identity_map)
+    del loaded
+    session.expunge_all()
+    return {"rows_loaded": rows, "peak_allocated_bytes": peak}
+
+
+async def run_benchmark(centres: int, students_per_centre: int) -> dict:
+    exam_centre = ExamCentreService()
+    student = StudentService()
+    old_mapping = selectinload(ExamCentre.students).selectinload(Student.exam_centre)
+
+    async with async_session_maker() as session:
+        sample = await seed(session, centres, students_per_centre)
+        centre_uid, centre_no = sample.uid, sample.exam_centre_no
+
+        async def all_before():
+            return (await session.exec(select(ExamCentre).options(old_mapping))).all()
+
+        async def all_after():
+            return await exam_centre.get_all_exam_centres(session, limit=settings.PAGE_SIZE_DEFAULT)
+
+        async def one_before():
+            return (await session.exec(select(ExamCentre).where(ExamCentre.uid == centre_uid).options(old_mapping))).one()
+
+        async def one_after():
+            centre = await exam_centre.get_exam_centre_by_exam_centre_uid(str(centre_uid), session)
+            page = await student.get_students_by_exam_centre_no(centre_no, session, limit=settings.PAGE_SIZE_DEFAULT)
+            return centre, page
+
+        report = {
+            "/centre/all before": await measure(session, all_before),
+            "/centre/all after": await measure(session, all_after),
+            "/centre/{id} before": await measure(session, one_before),
+            "/centre/{id} and first /students page after": await measure(session, one_after),
+        }
+        await session.rollback()
+
+    return report
+
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.centre_loading")
+    parser.add_argument("--centres", type=int, default=1000)
+    parser.add_argument("--students", type=int, default=500, help="Students per centre")
+    args = parser.parse_args(argv)
+
+    try:
+        report = await run_benchmark(args.centres, args.students)
+    finally:
+        await engine.dispose()
+
+    print(f"{args.centres} centres x {args.students} students")
+    for case, figures in report.items():
+        print(
+            f"{case:44} {figures['rows_loaded']:>9,} rows {figures['peak_allocated_bytes']:>14,} bytes peak"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,75 @@
+"""Compares the default response path with the fast JSON path.
+
+Run from the repository root:
+
+    python -m benchmarks.fast_json
+
+Serialises a /student/all page and a /centre/{id} body both ways, checks
+that they produce the same JSON, and reports the responses per second and
+peak memory of each.
+"""
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from datetime import datetime
+from typing import List
+import asyncio
+import orjson
+import time
+import tracemalloc
+import uuid
+from app.fast_json import dumps
+from app.models import ExamCentre, Student
+from app.schemas import ExamCentreResponseModel, StudentResponseModel
+
+
+async def run_benchmark(rounds: int = 50, page_size: int = 100) -> dict:
+    now = datetime.now()
+    centre = ExamCentre(
+        uid=uuid.uuid4(), exam_centre_no="a1b2c3", exam_centre_name="Central High", exam_centre_location="Lagos",
+        exam_centre_admin="Ada Obi", exam_centre_admin_email="ada@example.com", exam_centre_admin_phone="0800000000",
+        created_at=now, updated_at=now,
+    )
+    grades = {name: "B" for name in ("Mathematics", "English", "Physics", "Chemistry", "Biology", "Economics", "Geography", "Civic Education", "Literature")}
+    students = []
+    for i in range(page_size):
+        student = Student(
+            uid=uuid.uuid4(), first_name=f"First{i}", last_name=f"Last{i}", exam_centre_no=centre.exam_centre_no,
+            exam_id=f"{i:08d}", exam_year=2025, result=dict(grades), is_approved=True, created_at=now, updated_at=now,
+        )
+        student.exam_centre = centre
+        students.append(student)
+
+    cases = {
+        "/student/all": (students, List[StudentResponseModel], StudentResponseModel),
+        "/centre/{id}": (centre, ExamCentreResponseModel, ExamCentreResponseModel),
+    }
+
+    # FastAPI builds the response field once per route, as here.
+    async def default_path(content, field):
+        return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+    async def fast_path(content, model):
+        return dumps(content, model)
+
+    report = {}
+    for route, (content, response_model, model) in cases.items():
+        field = create_model_field(name="Response", type_=response_model, mode="serialization")
+        assert orjson.loads(await default_path(content, field)) == orjson.loads(await fast_path(content, model))
+        for name, run, argument in (("default", default_path, field), ("fast", fast_path, model)):
+            started_at = time.perf_counter()
+            for _ in range(rounds):
+                await run(content, argument)
+            elapsed = time.perf_counter() - started_at
+
+            tracemalloc.start()
+            await run(content, argument)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            report[f"{route} {name}"] = {"responses_per_second": round(rounds / elapsed, 1), "peak_allocated_bytes": peak}
+    return report
+
+if __name__ == "__main__":
+    for case, figures in asyncio.run(run_benchmark()).items():
+        print(f"{case:24} {figures['responses_per_second']:>12,.1f} responses/s {figures['peak_allocated_bytes']:>12,} bytes peak")
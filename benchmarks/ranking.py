@@ -0,0 +1,57 @@
+"""Times the ranking of a synthetic exam year.
+
+Run from the repository root:
+
+    python -m benchmarks.ranking [candidates] [subjects] [centres]
+
+Ranks a random exam year of the given shape, by default a million
+candidates in 9 subjects across 5000 centres, and reports the best of three
+times and the peak memory.
+"""
+import numpy as np
+import sys
+import time
+import tracemalloc
+from app.config import settings
+from app.ranking import compute_aggregates, grade_lookup_tables
+
+
+def run_benchmark(n_candidates: int = 1_000_000, n_subjects: int = 9, n_centres: int = 5000, rounds: int = 3) -> dict:
+    rng = np.random.default_rng(0)
+    # About one grade in ten is missing, so candidates take different subject counts.
+    grades = rng.integers(0, len(settings.GRADE_POINTS) + 1, size=(n_candidates, n_subjects), dtype=np.int8)
+    grades[rng.random((n_candidates, n_subjects)) < 0.1] = 0
+    centres = rng.integers(0, n_centres, size=n_candidates)
+    points_table, pass_table = grade_lookup_tables(settings.GRADE_POINTS, settings.PASS_GRADES)
+
+    def run():
+        return compute_aggregates(grades, centres, n_centres, points_table, pass_table, settings.RANKING_MIN_PASSES, [0])
+
+    timings = []
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started_at)
+
+    tracemalloc.start()
+    aggregates = run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "candidates": n_candidates,
+        "subjects": n_subjects,
+        "centres": n_centres,
+        "passed": int(aggregates["passed"].sum()),
+        "best_seconds": round(min(timings), 3),
+        "peak_allocated_bytes": peak,
+    }
+
+
+
+if __name__ == "__main__":
+    report = run_benchmark(*(int(arg) for arg in sys.argv[1:4]))
+    print(
+        f"{report['candidates']:,} candidates x {report['subjects']} subjects, {report['centres']:,} centres: "
+        f"{report['best_seconds']:.3f}s best of 3, {report['peak_allocated_bytes']:,} bytes peak, {report['passed']:,} passed"
+    )
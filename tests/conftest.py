@@ -0,0 +1,176 @@
+"""Shared fixtures.
+
+Tests that need a database run against DATABASE_URL, which should name a
+scratch Postgres database. The schema is created there if it is missing,
+and every row a test writes is deleted again. Without a reachable database
+those tests are skipped. The replica routing tests also need
+DATABASE_REPLICA_URL to name a second database.
+"""
+import os
+
+# The app reads its settings at import time; these stand in for the ones
+# the tests never use.
+for name, value in {
+    "DOMAIN_URL": "http://localhost",
+    "DATABASE_URL": "postgresql+asyncpg://postgres@localhost/resultify_test",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "CODE_GENERATOR_KEY": "test-code-generator-key",
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_PORT": "25",
+    "MAIL_SERVER": "localhost",
+    "MAIL_FROM": "test@example.com",
+    "MAIL_FROM_NAME": "Resultify tests",
+    "SUPER_ADMIN_EMAIL": "admin@example.com",
+    "SUPER_ADMIN_PASSWORD": "test",
+    "SUPER_ADMIN_FIRSTNAME": "Test",
+    "SUPER_ADMIN_LASTNAME": "Admin",
+    "SUPER_ADMIN_PHONE_NUMBER": "0800000000",
+}.items():
+    os.environ.setdefault(name, value)
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import text
+from typing import List, Optional
+import asyncio
+import pytest
+import time
+import uuid
+from pytest_asyncio import is_async_test
+from app.analytics import analytics_refresher
+from app.catalogue import subject_catalogue
+from app.db import main as db
+from app.models import ExamCentre, Student, Subject
+
+
+def pytest_collection_modifyitems(items):
+    # The engines' pooled connections belong to one event loop, so every test shares it.
+    marker = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(marker, append=False)
+
+
+async def _wait_for(condition, timeout: float = 5) -> bool:
+    """Polls `condition`, a function or coroutine function, until it is true or `timeout` passes."""
+    deadline = time.monotonic() + timeout
+    while True:
+        satisfied = condition()
+        if asyncio.iscoroutine(satisfied):
+            satisfied = await satisfied
+        if satisfied:
+            return True
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.05)
+
+@pytest.fixture
+def wait_for():
+    return _wait_for
+
+
+@pytest.fixture(scope="session")
+async def database():
+    """The primary engine, once the schema exists; skips the test without a database."""
+    try:
+        await db.init_db()
+    except (OSError, SQLAlchemyError) as e:
+        pytest.skip(f"needs a Postgres database at DATABASE_URL: {e}")
+
+    yield db.engine
+
+    await analytics_refresher.shutdown()
+    await db.engine.dispose()
+    if db.replica_engine is not None:
+        await db.replica_engine.dispose()
+
+
+class Rows:
+    """Creates centres, subjects and students for one test and deletes them afterwards.
+
+    Rows a test creates some other way are cleaned up too once their
+    exam_centre_no or subject_code is added to `centre_nos` or `subject_codes`.
+    Subject writes move the catalogue version, as SubjectService's do.
+    """
+
+    def __init__(self) -> None:
+        self.centre_nos: List[str] = []
+        self.subject_codes: List[str] = []
+
+    @staticmethod
+    def _suffix() -> str:
+        return uuid.uuid4().hex[:5]
+
+    async def centre(self) -> ExamCentre:
+        suffix = self._suffix()
+        centre = ExamCentre(
+            exam_centre_no=f"t{suffix}", exam_centre_name=f"Test Centre {suffix}", exam_centre_location="Lagos",
+            exam_centre_admin="Test", exam_centre_admin_email=f"centre-{suffix}@example.com", exam_centre_admin_phone="0800000000",
+        )
+        self.centre_nos.append(centre.exam_centre_no)
+        return await self._add(centre)
+
+    async def subject(self, name: Optional[str] = None) -> Subject:
+        suffix = self._suffix()
+        subject = Subject(subject_name=name or f"Test Subject {suffix}", subject_code=f"t{suffix}")
+        self.subject_codes.append(subject.subject_code)
+        async with db.async_session_maker() as session:
+            session.add(subject)
+            await subject_catalogue.bump(session)
+            await session.commit()
+        subject_catalogue.invalidate()
+        return subject
+
+    async def student(self, centre: ExamCentre, result: Optional[dict] = None, exam_year: int = 2025) -> Student:
+        return await self._add(Student(
+            first_name="Test", last_name="Student", exam_centre_no=centre.exam_centre_no,
+            exam_id=f"t{uuid.uuid4().hex[:7]}", exam_year=exam_year, result=result,
+        ))
+
+    async def _add(self, row):
+        async with db.async_session_maker() as session:
+            session.add(row)
+            await session.commit()
+        return row
+
+    async def delete(self) -> None:
+        async with db.async_session_maker() as session:
+            # Result rows and rankings go with their students and subjects.
+            await session.exec(text("DELETE FROM students WHERE exam_centre_no = ANY(CAST(:centre_nos AS text[]))").bindparams(centre_nos=self.centre_nos))
+            await session.exec(text("DELETE FROM exam_centres WHERE exam_centre_no = ANY(CAST(:centre_nos AS text[]))").bindparams(centre_nos=self.centre_nos))
+            await session.exec(text("DELETE FROM subjects WHERE subject_code = ANY(CAST(:subject_codes AS text[]))").bindparams(subject_codes=self.subject_codes))
+            if self.subject_codes:
+                await subject_catalogue.bump(session)
+            await session.commit()
+        subject_catalogue.invalidate()
+
+@pytest.fixture
+async def rows(database):
+    created = Rows()
+    yield created
+    await created.delete()
+
+
+def _reset_router() -> None:
+    db.replica_router.last_write_at = 0.0
+    db.replica_router.unavailable_until = 0.0
+
+@pytest.fixture
+async def replica(database):
+    """The replica engine, with the router reset; skips the test unless a second database is configured.
+
+    No replication is needed: the tests only check which database answers.
+    An analytics refresh left pending by an earlier test would count as a
+    write when it commits, so it is cancelled first.
+    """
+    if db.replica_engine is None:
+        pytest.skip("needs DATABASE_REPLICA_URL")
+    if db.replica_engine.url.database == db.engine.url.database:
+        pytest.skip("DATABASE_URL and DATABASE_REPLICA_URL must name different databases")
+
+    await analytics_refresher.shutdown()
+    _reset_router()
+    yield db.replica_engine
+    await analytics_refresher.shutdown()
+    _reset_router()
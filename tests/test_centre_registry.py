@@ -0,0 +1,86 @@
+import pytest
+import uuid
+from app.centre_registry import CentreRegistry, centre_registry
+from app.config import settings
+from app.db.main import async_session_maker
+from app.listener import ChannelListener, channel_listener
+from app.schemas import ExamCentreCreateModel
+from app.service import ExamCentreService
+
+exam_centre = ExamCentreService()
+
+
+@pytest.fixture
+async def reader(database, wait_for):
+    """A second worker's registry, which only hears about the app's writes through LISTEN/NOTIFY.
+
+    The app's own centre_registry and channel_listener play the writer.
+    """
+    reader_listener = ChannelListener(keepalive=settings.NOTIFY_LISTENER_KEEPALIVE, reconnect_delay=1)
+    registry = CentreRegistry(maxsize=100, ttl=settings.CENTRE_REGISTRY_TTL, listener=reader_listener)
+    await channel_listener.start()
+    await reader_listener.start()
+    try:
+        assert await wait_for(lambda: channel_listener.listening and reader_listener.listening)
+        yield registry, reader_listener
+    finally:
+        await reader_listener.stop()
+        await channel_listener.stop()
+
+async def _create_centre(rows, name: str):
+    suffix = uuid.uuid4().hex[:8]
+    async with async_session_maker() as session:
+        centre = await exam_centre.create_an_exam_centre(ExamCentreCreateModel(
+            exam_centre_name=f"{name} {suffix}", exam_centre_location="Lagos", exam_centre_admin="Test",
+            exam_centre_admin_email=f"registry-{suffix}@example.com", exam_centre_admin_phone="0800000000",
+        ), session)
+    rows.centre_nos.append(centre.exam_centre_no)
+    return centre
+
+
+async def test_an_update_drops_the_centre_on_both_workers(reader, rows, wait_for):
+    registry, _ = reader
+    centre = await _create_centre(rows, "Registry Test")
+
+    async def cached():
+        # The create's own notification may still be on its way and drop the first copy.
+        first = await registry.get("exam_centre_no", centre.exam_centre_no)
+        return first is not None and await registry.get("exam_centre_no", centre.exam_centre_no) is first
+
+    assert await wait_for(cached)
+    await centre_registry.get("uid", str(centre.uid))
+
+    renamed = f"{centre.exam_centre_name} renamed"
+    async with async_session_maker() as session:
+        await exam_centre.update_an_exam_centre(str(centre.uid), {"exam_centre_name": renamed}, session)
+
+    async def sees_rename():
+        cached = await registry.get("exam_centre_no", centre.exam_centre_no)
+        return cached is not None and cached.exam_centre_name == renamed
+
+    assert await wait_for(sees_rename)
+    assert (await centre_registry.get("uid", str(centre.uid))).exam_centre_name == renamed
+
+
+async def test_a_delete_drops_the_centre_on_the_other_worker(reader, rows, wait_for):
+    registry, _ = reader
+    centre = await _create_centre(rows, "Registry Test")
+    await registry.get("uid", str(centre.uid))
+    await registry.get("exam_centre_no", centre.exam_centre_no)
+
+    async with async_session_maker() as session:
+        await exam_centre.delete_an_exam_centre(str(centre.uid), session)
+
+    async def sees_delete():
+        return await registry.get("exam_centre_no", centre.exam_centre_no) is None and await registry.get("uid", centre.uid) is None
+
+    assert await wait_for(sees_delete)
+
+
+async def test_nothing_is_cached_without_a_listener(reader, rows):
+    registry, reader_listener = reader
+    await reader_listener.stop()
+    centre = await _create_centre(rows, "Registry Test offline")
+
+    first = await registry.get("uid", str(centre.uid))
+    assert await registry.get("uid", str(centre.uid)) is not first
@@ -0,0 +1,31 @@
+import pytest
+import string
+from app.codes import CodeGenerator
+from app.models import exam_centre_no_seq, exam_id_seq
+
+
+@pytest.fixture
+def exam_ids():
+    return CodeGenerator(exam_id_seq, length=8, bits=40, key="test-key")
+
+
+def test_codes_are_distinct_and_never_look_like_legacy_hex_codes(exam_ids):
+    codes = [exam_ids.code_for(value) for value in range(1, 20001)]
+
+    assert len(set(codes)) == len(codes)
+    assert all(len(code) == 8 for code in codes)
+    assert not any(set(code) <= set(string.hexdigits.lower()) for code in codes)
+
+
+def test_the_largest_value_still_encodes_to_length(exam_ids):
+    assert len(exam_ids.encode(2 ** 40 - 1)) == 8
+
+
+def test_a_sequence_past_its_bits_is_exhausted(exam_ids):
+    with pytest.raises(ValueError):
+        exam_ids.code_for(2 ** 40)
+
+
+def test_bits_must_fit_the_code_length():
+    with pytest.raises(ValueError):
+        CodeGenerator(exam_centre_no_seq, length=6, bits=32, key="test-key")
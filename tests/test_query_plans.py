@@ -0,0 +1,211 @@
+"""Checks that the statements app/service.py issues use their indexes.
+
+Each test runs a service method against a seeded dataset, captures the SQL
+it sends and EXPLAINs the statement under test with the parameters it was
+sent with. The dataset is COPYed in inside one transaction that is rolled
+back at the end, and ANALYZEd so the planner sees its real size. The
+service methods commit into a savepoint, so their writes go with it.
+"""
+from sqlalchemy import event
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime, timedelta
+from typing import List, Set, Tuple
+import json
+import pytest
+import uuid
+from app.catalogue import subject_catalogue
+from app.db.main import async_session_maker
+from app.service import ExamCentreService, ResultSheetService, StudentService
+
+CENTRES = 1000
+STUDENTS_PER_CENTRE = 20
+SUBJECTS = (("Plan Mathematics", "qpm001"), ("Plan English", "qpe001"))
+GRADES = ("A1", "B2", "B3", "C4", "C5", "C6", "D7", "E8", "F9")
+# Tables big enough that a sequential scan of them is a regression.
+SEEDED_TABLES = {"students", "student_results", "exam_centres"}
+
+
+def _centre_no(c: int) -> str:
+    return f"qp{c:04d}"
+
+def _exam_id(n: int) -> str:
+    return f"qp{n:06d}"
+
+
+async def _seed(session: AsyncSession) -> None:
+    # The driver only sends BEGIN with the first statement, and COPY bypasses it.
+    await session.exec(text("SELECT 1"))
+    connection = await session.connection()
+    raw_connection = (await connection.get_raw_connection()).driver_connection
+    start = datetime(2025, 1, 1)
+
+    await raw_connection.copy_records_to_table(
+        "subjects",
+        records=[(uuid.uuid4(), name, code, start, start) for name, code in SUBJECTS],
+        columns=["uid", "subject_name", "subject_code", "created_at", "updated_at"]
+    )
+    await raw_connection.copy_records_to_table(
+        "exam_centres",
+        records=[
+            (uuid.uuid4(), _centre_no(c), f"Plan Centre {c}", "Lagos", "Admin", f"plan{c}@example.com", "0800000000", start, start)
+            for c in range(CENTRES)
+        ],
+        columns=[
+            "uid", "exam_centre_no", "exam_centre_name", "exam_centre_location", "exam_centre_admin",
+            "exam_centre_admin_email", "exam_centre_admin_phone", "created_at", "updated_at"
+        ]
+    )
+
+    students, results = [], []
+    for n in range(CENTRES * STUDENTS_PER_CENTRE):
+        uid, created_at = uuid.uuid4(), start + timedelta(minutes=n)
+        # A1 is rare, so the grade listing has to find it through its index.
+        grades = {name: "A1" if n % 500 == 0 else GRADES[1 + (n + i) % (len(GRADES) - 1)] for i, (name, _) in enumerate(SUBJECTS)}
+        students.append((uid, "First", "Last", _centre_no(n % CENTRES), _exam_id(n), True, 2025, json.dumps(grades), created_at, created_at))
+        results.extend((uid, code, grades[name], created_at) for name, code in SUBJECTS)
+    await raw_connection.copy_records_to_table(
+        "students",
+        records=students,
+        columns=["uid", "first_name", "last_name", "exam_centre_no", "exam_id", "is_approved", "exam_year", "result", "created_at", "updated_at"]
+    )
+    await raw_connection.copy_records_to_table(
+        "student_results", records=results, columns=["student_uid", "subject_code", "grade", "updated_at"]
+    )
+
+    await session.exec(text("ANALYZE subjects, exam_centres, students, student_results"))
+
+
+class Planner:
+    """Captures the statements a service call sends and EXPLAINs them."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def statements(self, call) -> List[Tuple[str, tuple]]:
+        """Runs `call(session)` and returns the (statement, parameters) it sent."""
+        sent = []
+        sync_connection = (await self.session.connection()).sync_connection
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            sent.append((statement, parameters))
+
+        event.listen(sync_connection, "before_cursor_execute", capture)
+        try:
+            result = call(self.session)
+            if hasattr(result, "__aiter__"):
+                async for _ in result:
+                    pass
+            else:
+                await result
+        finally:
+            event.remove(sync_connection, "before_cursor_execute", capture)
+        return sent
+
+    async def plan(self, call, marker: str) -> dict:
+        """The plan of the one statement `call` sends that contains `marker`."""
+        matching = [sent for sent in await self.statements(call) if marker in sent[0]]
+        assert len(matching) == 1, f"{len(matching)} statements contain {marker!r}"
+        statement, parameters = matching[0]
+
+        connection = await self.session.connection()
+        plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+
+
+def _nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+def _indexes(plan: dict) -> Set[str]:
+    return {node["Index Name"] for node in _nodes(plan) if "Index Name" in node}
+
+def _seq_scans(plan: dict) -> Set[str]:
+    return {node["Relation Name"] for node in _nodes(plan) if node["Node Type"] == "Seq Scan"} & SEEDED_TABLES
+
+
+@pytest.fixture(scope="module")
+async def planner(database):
+    async with database.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        try:
+            await _seed(session)
+            yield Planner(session)
+        finally:
+            await session.close()
+            await transaction.rollback()
+
+        # The catalogue may have loaded the seeded subjects; a committed bump makes it drop them.
+        async with async_session_maker() as session:
+            await subject_catalogue.bump(session)
+            await session.commit()
+        subject_catalogue.invalidate()
+
+
+LOOKUPS = {
+    "a student by uid": (
+        lambda session: StudentService().get_a_student(str(uuid.UUID(int=1)), session),
+        "FROM students", "students_pkey",
+    ),
+    "a student by exam ID": (
+        lambda session: StudentService().get_a_student_by_exam_id(_exam_id(123), session),
+        "FROM students", "ix_students_exam_id",
+    ),
+    "the students page": (
+        lambda session: StudentService().get_all_students(session, limit=100),
+        "FROM students", "ix_students_created_at_uid",
+    ),
+    "a centre's students page": (
+        lambda session: StudentService().get_students_by_exam_centre_no(_centre_no(7), session, limit=100),
+        "FROM students", "ix_students_exam_centre_no_created_at_uid",
+    ),
+    "the students with a grade": (
+        lambda session: StudentService().get_students_by_grade(SUBJECTS[0][1], "A1", session, limit=100),
+        "FROM students JOIN student_results", "ix_student_results_subject_code_grade_student_uid",
+    ),
+    "a student's results": (
+        lambda session: StudentService().get_result_documents([uuid.UUID(int=1)], session),
+        "FROM student_results", "student_results_pkey",
+    ),
+    "the centres page": (
+        lambda session: ExamCentreService().get_all_exam_centres(session, limit=100),
+        "FROM exam_centres", "ix_exam_centres_created_at_uid",
+    ),
+}
+
+@pytest.mark.parametrize("name", LOOKUPS)
+async def test_lookup_uses_its_index(planner, name):
+    call, marker, index = LOOKUPS[name]
+    plan = await planner.plan(call, marker)
+
+    assert index in _indexes(plan)
+    assert not _seq_scans(plan)
+
+
+async def test_result_upload_reaches_students_and_results_through_indexes(planner):
+    grades = {_exam_id(centre_index * CENTRES): "A1" for centre_index in range(STUDENTS_PER_CENTRE)}
+    plan = await planner.plan(
+        lambda session: StudentService().update_student_results(_centre_no(0), SUBJECTS[0][1], grades, session),
+        "UPDATE students",
+    )
+
+    indexes = _indexes(plan)
+    assert indexes & {"ix_students_exam_id", "ix_students_exam_centre_no_created_at_uid"}
+    assert "student_results_pkey" in indexes
+    assert not _seq_scans(plan)
+
+
+async def test_result_sheet_merge_updates_through_the_exam_id_index(planner):
+    rows = iter([[_exam_id(n), "B2", "C4"] for n in range(0, CENTRES * STUDENTS_PER_CENTRE, 1000)])
+    subject_names = [name for name, _ in SUBJECTS]
+    plan = await planner.plan(
+        lambda session: ResultSheetService().ingest_result_sheet(rows, subject_names, None, session),
+        "UPDATE students",
+    )
+
+    assert "ix_students_exam_id" in _indexes(plan)
+    assert not _seq_scans(plan)
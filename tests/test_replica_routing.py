@@ -0,0 +1,84 @@
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+import asyncio
+import pytest
+import time
+import uuid
+from app.config import settings
+from app.db import main as db
+from app.models import RevokedToken
+from app.service import StudentService
+
+
+async def _served_by() -> str:
+    """Name of the database that answered a read session's first query."""
+    async with db.read_session() as session:
+        return (await session.exec(text("SELECT current_database()"))).one()[0]
+
+async def _commit_a_write() -> None:
+    """Commits a flushed write that leaves no row behind."""
+    async with db.async_session_maker() as session:
+        token = RevokedToken(token_jti=f"replica-test-{uuid.uuid4()}")
+        session.add(token)
+        await session.flush()
+        await session.delete(token)
+        await session.commit()
+
+
+async def test_idle_read_uses_the_replica(replica):
+    assert await _served_by() == replica.url.database
+
+
+async def test_read_after_a_write_uses_the_primary_until_the_window_passes(replica):
+    await _commit_a_write()
+    assert await _served_by() == db.engine.url.database
+
+    await asyncio.sleep(db.replica_router.read_your_writes + 0.1)
+    assert await _served_by() == replica.url.database
+
+
+@pytest.fixture
+async def unreachable_replica(replica):
+    # Port 1 refuses connections.
+    unreachable = db.build_engine(
+        replica.url.set(host="127.0.0.1", port=1, query={}).render_as_string(hide_password=False),
+        connect_args={"timeout": settings.DB_REPLICA_CONNECT_TIMEOUT}
+    )
+    working_session_maker = db.replica_session_maker
+    db.replica_session_maker = sessionmaker(bind=unreachable, class_=AsyncSession, expire_on_commit=False)
+    yield unreachable
+    db.replica_session_maker = working_session_maker
+    await unreachable.dispose()
+
+async def test_unreachable_replica_falls_back_to_the_primary(unreachable_replica):
+    fallbacks = db.replica_router.fallbacks
+    started_at = time.perf_counter()
+
+    assert await _served_by() == db.engine.url.database
+    assert db.replica_router.fallbacks == fallbacks + 1
+    assert time.perf_counter() - started_at < settings.DB_REPLICA_CONNECT_TIMEOUT + 1
+    assert not db.replica_router.use_replica()
+
+
+async def test_read_after_a_statement_write_uses_the_primary(replica, rows):
+    centre = await rows.centre()
+    subject = await rows.subject()
+    student = await rows.student(centre)
+    db.replica_router.last_write_at = 0.0
+
+    async with db.async_session_maker() as session:
+        updated = await StudentService().update_student_results(
+            centre.exam_centre_no, subject.subject_code, {student.exam_id: "A1"}, session
+        )
+
+    assert updated["applied"] == [student.exam_id]
+    assert await _served_by() == db.engine.url.database
+
+
+async def test_a_commit_without_writes_keeps_reads_on_the_replica(replica):
+    async with db.async_session_maker() as session:
+        await session.exec(text("SELECT 1"))
+        await session.commit()
+
+    assert await _served_by() == replica.url.database
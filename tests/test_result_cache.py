@@ -0,0 +1,219 @@
+from typing import Dict, Optional, Tuple
+import asyncio
+import fnmatch
+import pytest
+import time
+from app.config import settings
+from app.listener import ChannelListener
+from app.result_cache import CachedDocument, LocalCacheBackend, RedisCacheBackend, ResultDocumentCache
+
+TEST_PREFIX = "result-test:"
+
+
+class StandInRedis:
+    """In-memory stand-in for the redis.asyncio client calls RedisCacheBackend makes."""
+
+    def __init__(self) -> None:
+        self._entries: Dict[bytes, Tuple[Optional[float], bytes]] = {}
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    async def get(self, key) -> Optional[bytes]:
+        return self._live(self._encode(key))
+
+    async def set(self, key, value, ex: Optional[int] = None) -> bool:
+        self._entries[self._encode(key)] = (time.monotonic() + ex if ex else None, self._encode(value))
+        return True
+
+    async def delete(self, *keys) -> int:
+        return sum(self._entries.pop(self._encode(key), None) is not None for key in keys)
+
+    async def scan_iter(self, match: str = "*"):
+        for key in list(self._entries):
+            if self._live(key) is not None and fnmatch.fnmatchcase(key.decode(), match):
+                yield key
+
+
+def _document(exam_id: str) -> CachedDocument:
+    return CachedDocument(etag=f'"{exam_id}"', last_modified="Sun, 18 Oct 2026 00:00:00 GMT", body=b'{"exam_id": "%s"}' % exam_id.encode())
+
+def _result_cache(backend, ttl: float) -> ResultDocumentCache:
+    cache = ResultDocumentCache(backend, ttl=ttl)
+    cache.PREFIX = TEST_PREFIX
+    return cache
+
+
+@pytest.fixture
+async def redis_client():
+    """REDIS_URL's client when it is set, otherwise StandInRedis."""
+    if not settings.REDIS_URL:
+        yield StandInRedis()
+        return
+
+    import redis.asyncio
+
+    client = redis.asyncio.from_url(settings.REDIS_URL)
+    yield client
+    await client.aclose()
+
+@pytest.fixture
+async def redis_cache(redis_client):
+    cache = _result_cache(RedisCacheBackend(client=redis_client), ttl=60)
+    yield cache
+    await cache.clear()
+
+
+async def test_redis_reads_back_a_stored_document(redis_cache):
+    await redis_cache.set("student", "00000001", _document("00000001"))
+    assert await redis_cache.get("student", "00000001") == _document("00000001")
+
+
+async def test_redis_invalidating_an_exam_id_drops_every_view_of_it(redis_cache):
+    await redis_cache.set("student", "00000001", _document("00000001"))
+    await redis_cache.set("candidate", "00000001", _document("00000001"))
+    await redis_cache.set("student", "00000002", _document("00000002"))
+
+    await redis_cache.invalidate(["00000001"])
+
+    assert await redis_cache.get("student", "00000001") is None
+    assert await redis_cache.get("candidate", "00000001") is None
+    assert await redis_cache.get("student", "00000002") is not None
+
+
+async def test_redis_invalidates_more_than_one_delete_batch(redis_cache):
+    exam_ids = [f"{i:08d}" for i in range(redis_cache.DELETE_BATCH_SIZE + 10)]
+    for exam_id in exam_ids:
+        await redis_cache.set("student", exam_id, _document(exam_id))
+
+    await redis_cache.invalidate(exam_ids)
+
+    assert [exam_id for exam_id in exam_ids if await redis_cache.get("student", exam_id) is not None] == []
+
+
+async def test_redis_clear_only_drops_keys_under_the_cache_prefix(redis_cache, redis_client):
+    await redis_cache.set("student", "00000003", _document("00000003"))
+    await redis_client.set("other:00000003", b"kept", ex=60)
+    try:
+        await redis_cache.clear()
+
+        assert await redis_cache.get("student", "00000003") is None
+        assert await redis_client.get("other:00000003") == b"kept"
+    finally:
+        await redis_client.delete("other:00000003")
+
+
+async def test_redis_documents_expire_after_the_cache_ttl(redis_client):
+    cache = _result_cache(RedisCacheBackend(client=redis_client), ttl=1)
+    await cache.set("student", "00000004", _document("00000004"))
+    await asyncio.sleep(1.2)
+    assert await cache.get("student", "00000004") is None
+
+
+@pytest.fixture
+async def workers(database, wait_for):
+    """Two LocalCacheBackends, each with its own channel listener, as two workers would have."""
+    listeners = [ChannelListener(keepalive=settings.NOTIFY_LISTENER_KEEPALIVE, reconnect_delay=1) for _ in range(2)]
+    backends = [LocalCacheBackend(maxsize=100, ttl=60, listener=listener) for listener in listeners]
+    for listener in listeners:
+        await listener.start()
+    try:
+        assert await wait_for(lambda: all(listener.listening for listener in listeners))
+        yield listeners, backends
+    finally:
+        for listener in listeners:
+            await listener.stop()
+
+async def _dropped(cache: ResultDocumentCache, exam_id: str) -> bool:
+    return await cache.get("student", exam_id) is None
+
+
+async def test_local_invalidation_reaches_the_other_worker(workers, wait_for):
+    _, (writer_backend, reader_backend) = workers
+    writer, reader = _result_cache(writer_backend, ttl=60), _result_cache(reader_backend, ttl=60)
+    for exam_id in ("00000001", "00000002"):
+        await reader.set("student", exam_id, _document(exam_id))
+
+    await writer.invalidate(["00000001"])
+
+    assert await wait_for(lambda: _dropped(reader, "00000001"))
+    assert await reader.get("student", "00000002") is not None
+
+
+async def test_local_clear_reaches_the_other_worker(workers, wait_for):
+    _, (writer_backend, reader_backend) = workers
+    writer, reader = _result_cache(writer_backend, ttl=60), _result_cache(reader_backend, ttl=60)
+    await reader.set("student", "00000002", _document("00000002"))
+
+    await writer.clear()
+
+    assert await wait_for(lambda: _dropped(reader, "00000002"))
+
+
+async def test_local_documents_expire_after_the_cache_ttl(workers):
+    _, (_, backend) = workers
+    cache = _result_cache(backend, ttl=0.2)
+    await cache.set("student", "00000003", _document("00000003"))
+    await asyncio.sleep(0.3)
+    assert await _dropped(cache, "00000003")
+
+
+async def test_local_caches_nothing_without_a_listener(workers):
+    (_, listener), (_, backend) = workers
+    cache = _result_cache(backend, ttl=60)
+    await listener.stop()
+
+    await cache.set("student", "00000004", _document("00000004"))
+
+    assert await _dropped(cache, "00000004")
+
+
+async def test_a_load_invalidated_while_in_flight_is_not_stored(redis_cache):
+    with redis_cache.loading("00000005") as generation:
+        with redis_cache.loading("00000006") as other:
+            await redis_cache.invalidate(["00000005"])
+            await redis_cache.set("student", "00000005", _document("00000005"), generation)
+            await redis_cache.set("student", "00000006", _document("00000006"), other)
+
+    assert await redis_cache.get("student", "00000005") is None
+    assert await redis_cache.get("student", "00000006") is not None
+    assert redis_cache.stale_loads == 1
+
+    with redis_cache.loading("00000005") as generation:
+        await redis_cache.set("student", "00000005", _document("00000005"), generation)
+    assert await redis_cache.get("student", "00000005") is not None
+
+
+async def test_a_load_in_flight_during_a_clear_is_not_stored(redis_cache):
+    with redis_cache.loading("00000007") as generation:
+        await redis_cache.clear()
+        await redis_cache.set("candidate", "00000007", _document("00000007"), generation)
+
+    assert await redis_cache.get("candidate", "00000007") is None
+
+
+async def test_local_invalidation_from_the_other_worker_drops_a_load_in_flight(workers, wait_for):
+    _, (writer_backend, reader_backend) = workers
+    writer, reader = _result_cache(writer_backend, ttl=60), _result_cache(reader_backend, ttl=60)
+
+    def bumped():
+        with reader.loading("00000008") as current:
+            return current != generation
+
+    with reader.loading("00000008") as generation:
+        await writer.invalidate(["00000008"])
+        assert await wait_for(bumped)
+        await reader.set("student", "00000008", _document("00000008"), generation)
+
+    assert await _dropped(reader, "00000008")
@@ -0,0 +1,31 @@
+import io
+from app.service import ResultSheetService
+from app.sheets import iter_records, iter_sheet_rows
+
+# "\xe9" on its own is Latin-1, not UTF-8.
+SHEET = b"exam_id,qpm001\r\nq0000001,A1\r\nq000000\xe9,B2\r\nq0000003,C4\r\n"
+
+
+def test_a_csv_sheet_with_bad_bytes_is_read_to_the_end():
+    rows = list(iter_sheet_rows(io.BytesIO(SHEET), "results.csv"))
+
+    assert len(rows) == 4
+    assert rows[3] == ["q0000003", "C4"]
+
+
+def test_rows_that_are_not_utf8_are_rejected_with_their_line():
+    rows = list(iter_sheet_rows(io.BytesIO(SHEET), "results.csv"))
+    errors = []
+
+    records = ResultSheetService()._validate_rows(rows[1:], 2, ["Mathematics"], errors)
+
+    assert [record[1] for record in records] == ["q0000001", "q0000003"]
+    assert errors == [{"line": 3, "exam_id": None, "error": "not valid UTF-8"}]
+
+
+def test_registration_lines_that_are_not_utf8_have_no_record():
+    ndjson = b'{"first_name": "Ada"}\n{"first_name": "B\xe9"}\n{"first_name": "Chi"}\n'
+
+    records = list(iter_records(io.BytesIO(ndjson), "students.ndjson"))
+
+    assert [(line_no, record is None) for line_no, record in records] == [(1, False), (2, True), (3, False)]